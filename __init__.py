@@ -56,19 +56,20 @@ def create_app(config_class=Config):
     def track_user_activity():
         from flask_login import current_user
         from app.models import get_ist_now
+        from app import presence
         
         if current_user.is_authenticated:
-            # Update last activity every 5 minutes to avoid too many DB writes
-            current_time = get_ist_now()
-            if not hasattr(current_user, '_last_activity_update') or \
-               (current_time - current_user._last_activity_update).seconds > 300:
-                current_user.last_seen = current_time
-                current_user.is_online = True
-                current_user._last_activity_update = current_time
-                try:
-                    db.session.commit()
-                except:
-                    db.session.rollback()
+            # Presence lives in Redis; the user row is only written when it's
+            # down, and then at most once a minute per user
+            if presence.touch(current_user.id) or not presence.fallback_write_due(current_user.id):
+                return
+            
+            current_user.last_seen = get_ist_now()
+            current_user.is_online = True
+            try:
+                db.session.commit()
+            except:
+                db.session.rollback()
     
     # Add security headers with relaxed CSP for development
     @app.after_request
@@ -120,21 +121,16 @@ def create_app(config_class=Config):
             try:
                 from app.models import AnnouncementRead
                 
-                # Get all active announcements
+                # Active announcements the current user hasn't read yet
                 current_time = get_ist_now()
-                all_active = Announcement.query.filter(
+                active_announcements = Announcement.query.filter(
                     Announcement.is_active == True,
                     db.or_(
                         Announcement.expires_at.is_(None),
                         Announcement.expires_at > current_time
-                    )
+                    ),
+                    ~Announcement.read_by.any(AnnouncementRead.user_id == current_user.id)
                 ).order_by(Announcement.created_at.desc()).all()
-                
-                # Filter out announcements already read by current user
-                read_announcement_ids = db.session.query(AnnouncementRead.announcement_id).filter_by(user_id=current_user.id).all()
-                read_ids = [r[0] for r in read_announcement_ids]
-                
-                active_announcements = [a for a in all_active if a.id not in read_ids]
             except Exception:
                 # If table doesn't exist, show all announcements
                 try:
@@ -159,6 +155,19 @@ def create_app(config_class=Config):
             'unread_notifications_count': unread_count
         }
 
+    # Detection scores are stored as integer steps; refuse to write them
+    # into a database whose score columns still hold raw floats
+    if app.config.get("CHECK_SCORE_SCHEMA", True):
+        from app.models import unconverted_score_columns
+        
+        with app.app_context(), db.engine.connect() as conn:
+            pending = unconverted_score_columns(conn)
+        if pending:
+            columns = ", ".join(f"{table}.{column}" for table, column in pending)
+            raise RuntimeError(
+                f"Score columns not yet converted ({columns}); run extra/update_database.py"
+            )
+
     return app
 
 
@@ -167,7 +176,7 @@ def load_user(user_id):
     from app.models import User
     
     try:
-        return User.query.get(int(user_id))
+        return db.session.get(User, int(user_id))
     except (ValueError, TypeError):
         return None
 
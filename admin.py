@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response, send_file, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response, send_file, abort, Response, stream_with_context
 from flask_login import login_required, current_user
 from functools import wraps
 from app import db
@@ -8,11 +8,13 @@ import os
 import cv2
 import io
 from sqlalchemy import func, desc, and_, or_, case
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime, timedelta, date
 import csv
 import io
 import json
 from app.models import get_ist_now
+from app.utils import UPLOAD_BUFFER_SIZE, sniff_upload_type
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -27,6 +29,31 @@ def admin_required(f):
     return decorated_function
 
 
+# Rows fetched per round trip when streaming large exports
+EXPORT_BATCH_SIZE = 1000
+
+
+def _csv_response(filename, header, rows):
+    """Stream rows as a CSV download, one line at a time, instead of
+    building the whole file in memory"""
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        yield buffer.getvalue()
+        for row in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'},
+    )
+
+
 @admin_bp.route("/dashboard")
 @login_required
 @admin_required
@@ -110,7 +137,12 @@ def dashboard():
     
     # Recent cases with error handling
     try:
-        recent_cases = Case.query.order_by(desc(Case.created_at)).limit(10).all()
+        recent_cases = (
+            Case.query.options(selectinload(Case.target_images), selectinload(Case.location_matches))
+            .order_by(desc(Case.created_at))
+            .limit(10)
+            .all()
+        )
     except Exception:
         recent_cases = []
     
@@ -356,10 +388,10 @@ def delete_user(user_id):
 @login_required
 @admin_required
 def user_detail(user_id):
-    user = User.query.get_or_404(user_id)
+    user = User.query.options(selectinload(User.cases)).get_or_404(user_id)
     
     # Calculate total sightings across all user's cases
-    total_sightings = sum(len(case.sightings) for case in user.cases)
+    total_sightings = sum(case.total_sightings for case in user.cases)
     
     # Get recent activity logs for this user
     activity_logs = SystemLog.query.filter_by(user_id=user_id).order_by(desc(SystemLog.timestamp)).limit(10).all()
@@ -447,7 +479,11 @@ def cases():
     status_filter = request.args.get('status', '')
     search = request.args.get('search', '')
     
-    query = Case.query
+    query = Case.query.options(
+        selectinload(Case.target_images),
+        selectinload(Case.location_matches),
+        joinedload(Case.creator),
+    )
     
     # Apply filters
     if status_filter:
@@ -714,14 +750,12 @@ def export_users():
 @login_required
 @admin_required
 def export_cases():
-    cases = Case.query.all()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow(['ID', 'Person Name', 'Age', 'Status', 'Priority', 'Creator', 'Location', 'Sightings', 'Created At'])
+    query = Case.query.options(joinedload(Case.creator)).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
     
-    for case in cases:
-        writer.writerow([
+    rows = (
+        [
             case.id,
             case.person_name,
             case.age or 'Unknown',
@@ -731,14 +765,14 @@ def export_cases():
             case.last_seen_location or 'Not specified',
             case.total_sightings,
             case.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
+        ]
+        for case in query
+    )
     
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'cases_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return _csv_response(
+        f'cases_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+        ['ID', 'Person Name', 'Age', 'Status', 'Priority', 'Creator', 'Location', 'Sightings', 'Created At'],
+        rows,
     )
 
 
@@ -919,22 +953,24 @@ def create_announcement():
         
         # Create notifications for all non-admin users
         from app.models import Notification
-        regular_users = User.query.filter_by(is_admin=False).all()
-        
-        for user in regular_users:
-            notification = Notification(
-                user_id=user.id,
-                sender_id=current_user.id,
-                title=f"📢 New Announcement: {title}",
-                message=content,
-                type=type,
-                created_at=get_ist_now()
-            )
-            db.session.add(notification)
+        regular_user_ids = db.session.scalars(
+            db.select(User.id).filter_by(is_admin=False)
+        ).all()
+        
+        Notification.bulk_create([
+            {
+                'user_id': user_id,
+                'sender_id': current_user.id,
+                'title': f"📢 New Announcement: {title}",
+                'message': content,
+                'type': type,
+            }
+            for user_id in regular_user_ids
+        ])
         
         db.session.commit()
         
-        flash(f"Announcement created and sent to {len(regular_users)} users!", "success")
+        flash(f"Announcement created and sent to {len(regular_user_ids)} users!", "success")
         return redirect(url_for("admin.announcements"))
     
     return render_template("admin/create_announcement.html", tomorrow=tomorrow)
@@ -1013,14 +1049,18 @@ def ai_settings():
 @admin_required
 def update_ai_settings():
     """Handle AI settings form submission"""
+    # The table is tiny, so load it once rather than one lookup per field,
+    # and stamp every changed row with the same time
+    settings = {str(setting.id): setting for setting in AISettings.query.all()}
+    now = datetime.utcnow()
     for setting_id, value in request.form.items():
         if setting_id.startswith('setting_'):
             setting_id = setting_id.replace('setting_', '')
-            setting = AISettings.query.get(setting_id)
+            setting = settings.get(setting_id)
             if setting:
                 setting.setting_value = value
                 setting.updated_by = current_user.id
-                setting.updated_at = datetime.utcnow()
+                setting.updated_at = now
     
     db.session.commit()
     flash("AI settings updated successfully!", "success")
@@ -1234,6 +1274,10 @@ def upload_surveillance_footage():
                 flash('No video file selected', 'error')
                 return redirect(request.url)
             
+            if not sniff_upload_type(file, "video"):
+                flash('Uploaded file is not a video', 'error')
+                return redirect(request.url)
+            
             if file:
                 filename = secure_filename(file.filename)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1244,7 +1288,7 @@ def upload_surveillance_footage():
                 os.makedirs(surveillance_dir, exist_ok=True)
                 
                 file_path = os.path.join(surveillance_dir, filename)
-                file.save(file_path)
+                file.save(file_path, buffer_size=UPLOAD_BUFFER_SIZE)
                 
                 # Get video metadata
                 cap = cv2.VideoCapture(file_path)
@@ -1294,16 +1338,16 @@ def upload_surveillance_footage():
                             newly_processable_cases.append(case)
                 
                 # Notify case owners about available footage
-                for case in newly_processable_cases:
-                    notification = Notification(
-                        user_id=case.user_id,
-                        sender_id=current_user.id,
-                        title=f"📹 New CCTV Footage Available: {case.person_name}",
-                        message=f"New surveillance footage has been uploaded for location '{location_name}' which matches your case location '{case.last_seen_location}'. Your case can now be processed once approved by admin.",
-                        type="info",
-                        created_at=get_ist_now()
-                    )
-                    db.session.add(notification)
+                Notification.bulk_create([
+                    {
+                        'user_id': case.user_id,
+                        'sender_id': current_user.id,
+                        'title': f"📹 New CCTV Footage Available: {case.person_name}",
+                        'message': f"New surveillance footage has been uploaded for location '{location_name}' which matches your case location '{case.last_seen_location}'. Your case can now be processed once approved by admin.",
+                        'type': "info",
+                    }
+                    for case in newly_processable_cases
+                ])
                 
                 db.session.commit()
                 
@@ -1363,7 +1407,10 @@ def ai_analysis():
     status_filter = request.args.get('status', '')
     
     # Get location matches with filters
-    query = LocationMatch.query
+    query = LocationMatch.query.options(
+        joinedload(LocationMatch.case).selectinload(Case.target_images),
+        joinedload(LocationMatch.footage),
+    )
     if status_filter:
         query = query.filter_by(status=status_filter)
     
@@ -1771,6 +1818,11 @@ def bulk_upload_footage():
             
             for file in uploaded_files:
                 if file and file.filename:
+                    # Skip anything that isn't a video before writing it
+                    if not sniff_upload_type(file, "video"):
+                        flash(f"Skipped {file.filename}: not a video file", "warning")
+                        continue
+                    
                     # Process each file
                     filename = secure_filename(file.filename)
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1780,7 +1832,7 @@ def bulk_upload_footage():
                     surveillance_dir = os.path.join('app', 'static', 'surveillance')
                     os.makedirs(surveillance_dir, exist_ok=True)
                     file_path = os.path.join(surveillance_dir, filename)
-                    file.save(file_path)
+                    file.save(file_path, buffer_size=UPLOAD_BUFFER_SIZE)
                     
                     # Get video metadata
                     import cv2
@@ -1884,55 +1936,53 @@ def export_case_results(case_id):
     try:
         case = Case.query.get_or_404(case_id)
         
-        # Get all matches and detections
-        location_matches = LocationMatch.query.filter_by(case_id=case_id).all()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # CSV headers
-        writer.writerow([
-            'Case ID', 'Person Name', 'Footage Title', 'Location', 
-            'Match Score', 'Detection Time', 'Confidence Score', 
-            'Face Score', 'Clothing Score', 'Method', 'Verified', 'Notes'
-        ])
+        # One joined query over matches and their detections, fetched in
+        # batches while the response streams
+        results = (
+            db.session.query(LocationMatch, SurveillanceFootage, PersonDetection)
+            .join(SurveillanceFootage, LocationMatch.footage_id == SurveillanceFootage.id)
+            .outerjoin(PersonDetection, PersonDetection.location_match_id == LocationMatch.id)
+            .filter(LocationMatch.case_id == case_id)
+            .order_by(LocationMatch.id, PersonDetection.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
         
-        for match in location_matches:
-            detections = PersonDetection.query.filter_by(location_match_id=match.id).all()
-            
-            if detections:
-                for detection in detections:
-                    writer.writerow([
+        def rows():
+            for match, footage, detection in results:
+                if detection is None:
+                    yield [
                         case.id,
                         case.person_name,
-                        match.footage.title,
-                        match.footage.location_name,
+                        footage.title,
+                        footage.location_name,
                         f"{match.match_score:.3f}",
-                        detection.formatted_timestamp,
-                        f"{detection.confidence_score:.3f}",
-                        f"{detection.face_match_score:.3f}" if detection.face_match_score else '',
-                        f"{detection.clothing_match_score:.3f}" if detection.clothing_match_score else '',
-                        detection.analysis_method or '',
-                        'Yes' if detection.verified else 'No',
-                        detection.notes or ''
-                    ])
-            else:
-                writer.writerow([
+                        'No detections',
+                        '', '', '', '', '', ''
+                    ]
+                    continue
+                yield [
                     case.id,
                     case.person_name,
-                    match.footage.title,
-                    match.footage.location_name,
+                    footage.title,
+                    footage.location_name,
                     f"{match.match_score:.3f}",
-                    'No detections',
-                    '', '', '', '', '', ''
-                ])
-        
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'case_{case_id}_analysis_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+                    detection.formatted_timestamp,
+                    f"{detection.confidence_score:.3f}",
+                    f"{detection.face_match_score:.3f}" if detection.face_match_score else '',
+                    f"{detection.clothing_match_score:.3f}" if detection.clothing_match_score else '',
+                    detection.analysis_method or '',
+                    'Yes' if detection.verified else 'No',
+                    detection.notes or ''
+                ]
+        
+        return _csv_response(
+            f'case_{case_id}_analysis_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+            [
+                'Case ID', 'Person Name', 'Footage Title', 'Location', 
+                'Match Score', 'Detection Time', 'Confidence Score', 
+                'Face Score', 'Clothing Score', 'Method', 'Verified', 'Notes'
+            ],
+            rows(),
         )
         
     except Exception as e:
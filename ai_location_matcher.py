@@ -5,7 +5,6 @@ import cv2
 import numpy as np
 import face_recognition
 import os
-import json
 from datetime import datetime
 from app import db
 from app.models import Case, SurveillanceFootage, LocationMatch, PersonDetection
@@ -16,6 +15,8 @@ import queue
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371.0
+
 class AILocationMatcher:
     def __init__(self):
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
@@ -31,6 +32,18 @@ class AILocationMatcher:
         except:
             return None
     
+    def calculate_distance_batch(self, lat1, lon1, lats, lons):
+        """Calculate distances in kilometers from one point to arrays of coordinates"""
+        # Haversine on a sphere, so results differ slightly from the geodesic above
+        lats = np.radians(np.asarray(lats, dtype=np.float32))
+        lons = np.radians(np.asarray(lons, dtype=np.float32))
+        lat1 = np.float32(np.radians(lat1))
+        lon1 = np.float32(np.radians(lon1))
+        
+        a = (np.sin((lats - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    
     def find_nearby_footage(self, location_name):
         """Find surveillance footage near a given location"""
         try:
@@ -534,10 +547,10 @@ class AILocationMatcher:
                     confidence_score=confidence,
                     face_match_score=face_score,
                     clothing_match_score=clothing_score,
-                    detection_box=json.dumps({
+                    detection_box={
                         'top': int(top), 'right': int(right), 
                         'bottom': int(bottom), 'left': int(left)
-                    }),
+                    },
                     frame_path=f"detections/{frame_filename}",
                     analysis_method=method
                 )
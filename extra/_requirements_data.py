@@ -0,0 +1,91 @@
+"""
+Shared package data for the validation scripts
+Used by validate_requirements.py and validate_system.py
+"""
+
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+# (package name, import name) for every dependency the system needs
+PACKAGES = (
+    ('flask', 'flask'),
+    ('flask-sqlalchemy', 'flask_sqlalchemy'),
+    ('flask-migrate', 'flask_migrate'),
+    ('flask-wtf', 'flask_wtf'),
+    ('flask-login', 'flask_login'),
+    ('flask-bcrypt', 'flask_bcrypt'),
+    ('flask-moment', 'flask_moment'),
+    ('python-dotenv', 'dotenv'),
+    ('werkzeug', 'werkzeug'),
+    ('jinja2', 'jinja2'),
+    ('celery', 'celery'),
+    ('redis', 'redis'),
+    ('opencv-python', 'cv2'),
+    ('face-recognition', 'face_recognition'),
+    ('dlib', 'dlib'),
+    ('PIL', 'PIL'),
+    ('numpy', 'numpy'),
+    ('scikit-learn', 'sklearn'),
+    ('scipy', 'scipy'),
+    ('matplotlib', 'matplotlib'),
+    ('geopy', 'geopy'),
+    ('folium', 'folium'),
+    ('geojson', 'geojson'),
+    ('psycopg2-binary', 'psycopg2'),
+    ('sqlalchemy', 'sqlalchemy'),
+    ('alembic', 'alembic'),
+    ('WTForms', 'wtforms'),
+    ('email-validator', 'email_validator'),
+    ('validators', 'validators'),
+    ('itsdangerous', 'itsdangerous'),
+    ('markupsafe', 'markupsafe'),
+    ('bleach', 'bleach'),
+    ('cryptography', 'cryptography'),
+    ('filetype', 'filetype'),
+    ('requests', 'requests'),
+    ('cachetools', 'cachetools'),
+    ('orjson', 'orjson'),
+    ('python-dateutil', 'dateutil'),
+    ('gunicorn', 'gunicorn')
+)
+
+# Import name -> import names it cannot work without. Dependents of a
+# module that failed are skipped rather than probed.
+DEPENDENCIES = {
+    'flask': ('jinja2', 'werkzeug'),
+    'flask_sqlalchemy': ('flask', 'sqlalchemy'),
+    'flask_migrate': ('flask', 'alembic'),
+    'flask_wtf': ('flask', 'wtforms'),
+    'flask_login': ('flask',),
+    'flask_bcrypt': ('flask',),
+    'flask_moment': ('flask',),
+    'alembic': ('sqlalchemy',),
+    'cv2': ('numpy',),
+    'face_recognition': ('dlib', 'numpy', 'PIL'),
+    'scipy': ('numpy',),
+    'sklearn': ('numpy', 'scipy'),
+    'matplotlib': ('numpy',),
+    'folium': ('jinja2', 'requests'),
+}
+
+
+def find_module(import_name):
+    """Locate a module without importing it; return an error message or None"""
+    try:
+        if importlib.util.find_spec(import_name) is None:
+            return f"No module named '{import_name}'"
+    except (ImportError, ValueError) as e:
+        return str(e)
+    return None
+
+
+# One pool for the whole run; validate_system probes in many small batches
+_EXECUTOR = None
+
+
+def find_modules(import_names):
+    """Run find_module over several names concurrently, preserving order"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=8)
+    return list(_EXECUTOR.map(find_module, import_names))
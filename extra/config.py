@@ -16,11 +16,34 @@ class Config:
         "DATABASE_URL"
     ) or "sqlite:///" + os.path.join(basedir, "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Connection pool tuning for server databases (PostgreSQL). LIFO reuses
+    # the most recently returned connection, keeping its statement and
+    # catalog caches warm and letting surplus connections go idle and close.
+    # SQLite keeps SQLAlchemy's defaults.
+    if SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            "pool_use_lifo": True,
+            "pool_pre_ping": True,
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_recycle": 1800,
+        }
 
     # Celery configuration
     CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL") or "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND") or "redis://localhost:6379/0"
 
+    # Redis for online presence (see app/presence.py)
+    REDIS_URL = os.environ.get("REDIS_URL") or CELERY_BROKER_URL
+
+    # Push new chat messages over server-sent events instead of polling.
+    # Every open chat holds a request worker for up to a minute, so only
+    # enable this under an async worker class (gunicorn -k gevent)
+    CHAT_EVENT_STREAM = os.environ.get("CHAT_EVENT_STREAM", "").lower() in ("1", "true", "yes")
+
     # Upload configuration
     UPLOAD_FOLDER = os.path.join(basedir, "app/static/uploads")
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
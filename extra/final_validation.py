@@ -355,6 +355,7 @@ def test_chat_system():
             print(f"[OK] Message marked as delivered")
             
             test_message.mark_seen()
+            db.session.commit()
             print(f"[OK] Message marked as seen")
             
             return True
@@ -128,7 +128,7 @@ def check_file_upload_security():
         else:
             print("❌ File type validation missing")
             
-        if "validate_file_content" in routes_content:
+        if "sniff_upload_type" in routes_content:
             print("✅ File content validation implemented")
         else:
             print("❌ File content validation missing")
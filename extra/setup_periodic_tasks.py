@@ -22,10 +22,16 @@ def setup_periodic_tasks():
             'task': 'app.tasks.cleanup_files',
             'schedule': crontab(hour=2, minute=0),  # Run daily at 2:00 AM
         },
+        # Write Redis presence (last seen) back to the user table
+        'flush-presence': {
+            'task': 'app.tasks.flush_presence',
+            'schedule': 60.0,  # Every minute
+        },
     }
     celery.conf.timezone = 'UTC'
     
     print("✅ Periodic file cleanup task scheduled for 2:00 AM daily")
+    print("✅ Presence flush task scheduled every minute")
     print("📋 To start the scheduler, run: celery -A app.tasks beat")
     print("📋 To start the worker, run: python celery_worker.py")
 
@@ -4,23 +4,29 @@ Quick Installation Test Script
 Tests if the system can be installed and run successfully
 """
 
+import shlex
 import subprocess
 import sys
 import os
 
+# Only the tail of a failing command's stderr is worth printing
+MAX_ERROR_OUTPUT = 2000
+
 def run_command(command, description):
     """Run a command and return success status"""
     print(f"\n[TEST] {description}")
-    print(f"Command: {command}")
+    print(f"Command: {shlex.join(command)}")
     
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=300)
+        # Output is only needed on failure, so discard stdout and keep stderr
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                text=True, timeout=300)
         if result.returncode == 0:
             print(f"[OK] {description} - SUCCESS")
             return True
         else:
             print(f"[ERROR] {description} - FAILED")
-            print(f"Error: {result.stderr}")
+            print(f"Error: {result.stderr[-MAX_ERROR_OUTPUT:]}")
             return False
     except subprocess.TimeoutExpired:
         print(f"[ERROR] {description} - TIMEOUT")
@@ -35,15 +41,16 @@ def main():
     print("="*60)
     
     # Test commands
+    python = sys.executable
     tests = [
-        ("python --version", "Python Version Check"),
-        ("pip --version", "Pip Version Check"),
-        ("python validate_requirements.py", "Requirements Validation"),
-        ("python simple_system_check.py", "System Components Check"),
-        ("python -c \"from app import create_app; print('Flask app creation: OK')\"", "Flask App Test"),
-        ("python -c \"import cv2; print(f'OpenCV version: {cv2.__version__}')\"", "OpenCV Test"),
-        ("python -c \"import face_recognition; print('Face recognition: OK')\"", "Face Recognition Test"),
-        ("python -c \"from app.ai_location_matcher import ai_matcher; print('AI Matcher: OK')\"", "AI System Test")
+        ([python, "--version"], "Python Version Check"),
+        ([python, "-m", "pip", "--version"], "Pip Version Check"),
+        ([python, "validate_requirements.py"], "Requirements Validation"),
+        ([python, "simple_system_check.py"], "System Components Check"),
+        ([python, "-c", "from app import create_app; print('Flask app creation: OK')"], "Flask App Test"),
+        ([python, "-c", "import cv2; print(f'OpenCV version: {cv2.__version__}')"], "OpenCV Test"),
+        ([python, "-c", "import face_recognition; print('Face recognition: OK')"], "Face Recognition Test"),
+        ([python, "-c", "from app.ai_location_matcher import ai_matcher; print('AI Matcher: OK')"], "AI System Test")
     ]
     
     passed = 0
@@ -2,22 +2,80 @@
 """
 System Test Script for Missing Person Finder - Advanced AI System
 """
-import requests
-import json
-import time
+import io
 import os
+import sys
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, select
 from app import create_app, db
 from app.models import User, Case, SurveillanceFootage, LocationMatch
 
+# Report layout, formatted once at import
+RULE = "=" * 60
+REPORT_HEADER = f"\n{RULE}\n🧪 SYSTEM TEST REPORT\n{RULE}\n"
+SUMMARY_HEADER = f"\n{RULE}\n📊 TEST SUMMARY\n{RULE}\n"
+SUMMARY_LINE = "{:<20} {}\n"
+SUMMARY_RESULTS = "\nResults: {}/{} tests passed\n"
+PASS_LABEL = "✅ PASS"
+FAIL_LABEL = "❌ FAIL"
+
+# Building the app (extensions, engine, blueprints) is the costliest step,
+# so every test shares one instance
+_APP = None
+_APP_LOCK = threading.Lock()
+
+def get_app():
+    """Return the shared Flask app, creating it on first use"""
+    global _APP
+    with _APP_LOCK:
+        if _APP is None:
+            _APP = create_app()
+    return _APP
+
+_CLIENT = None
+
+def get_client():
+    """Return a test client for the shared app, creating it on first use"""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = get_app().test_client()
+    return _CLIENT
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout proxy that buffers writes from threads running a test"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def run_captured(self, test_func):
+        """Run a test, returning its result and everything it printed"""
+        self._local.buffer = io.StringIO()
+        try:
+            return test_func(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+
 def test_database_connection():
     """Test database connectivity"""
     print("🗄️ Testing database connection...")
     try:
-        app = create_app()
+        app = get_app()
         with app.app_context():
-            # Test basic query
-            user_count = User.query.count()
-            case_count = Case.query.count()
+            # Test basic query; both counts in one round trip
+            user_count, case_count = db.session.execute(select(
+                select(func.count()).select_from(User).scalar_subquery(),
+                select(func.count()).select_from(Case).scalar_subquery()
+            )).one()
             print(f"✅ Database connected - {user_count} users, {case_count} cases")
             return True
     except Exception as e:
@@ -41,6 +99,10 @@ def test_ai_system():
         print(f"❌ AI system test failed: {str(e)}")
         return False
 
+def _directory_status(directory):
+    """Return (directory, exists, writable) for an upload directory"""
+    return directory, os.path.isdir(directory), os.access(directory, os.W_OK)
+
 def test_file_upload():
     """Test file upload functionality"""
     print("📁 Testing file upload system...")
@@ -51,16 +113,18 @@ def test_file_upload():
             'app/static/detections'
         ]
         
-        for directory in upload_dirs:
-            if not os.path.exists(directory):
+        # Check the directories concurrently; os.access avoids a write probe
+        with ThreadPoolExecutor(max_workers=len(upload_dirs)) as executor:
+            statuses = list(executor.map(_directory_status, upload_dirs))
+        
+        for directory, exists, writable in statuses:
+            if not exists:
                 print(f"❌ Directory missing: {directory}")
                 return False
             
-            # Test write permissions
-            test_file = os.path.join(directory, 'test.txt')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            os.remove(test_file)
+            if not writable:
+                print(f"❌ Directory not writable: {directory}")
+                return False
         
         print("✅ File upload system working")
         return True
@@ -73,15 +137,19 @@ def test_redis_connection():
     print("🔴 Testing Redis connection...")
     try:
         import redis
-        r = redis.Redis(host='localhost', port=6379, db=0)
-        r.ping()
+        # Short timeouts so a missing server fails fast
+        r = redis.Redis(host='localhost', port=6379, db=0,
+                        socket_connect_timeout=1, socket_timeout=1)
         
-        # Test basic operations
-        r.set('test_key', 'test_value')
-        value = r.get('test_key')
-        r.delete('test_key')
+        # Test basic operations in a single round trip
+        pipe = r.pipeline()
+        pipe.ping()
+        pipe.set('test_key', 'test_value')
+        pipe.get('test_key')
+        pipe.delete('test_key')
+        _, _, value, _ = pipe.execute()
         
-        if value.decode() == 'test_value':
+        if value is not None and value.decode() == 'test_value':
             print("✅ Redis connection and operations working")
             return True
         else:
@@ -95,25 +163,25 @@ def test_web_application():
     """Test web application endpoints"""
     print("🌐 Testing web application...")
     try:
-        app = create_app()
-        with app.test_client() as client:
-            # Test home page
-            response = client.get('/')
-            if response.status_code != 200:
-                print(f"❌ Home page failed: {response.status_code}")
-                return False
-            
-            # Test login page
-            response = client.get('/login')
-            if response.status_code != 200:
-                print(f"❌ Login page failed: {response.status_code}")
-                return False
-            
-            # Test admin routes (should redirect to login)
-            response = client.get('/admin/dashboard')
-            if response.status_code not in [302, 401, 403]:
-                print(f"❌ Admin protection failed: {response.status_code}")
-                return False
+        client = get_client()
+        # Only status codes are checked, so HEAD requests are enough
+        # Test home page
+        response = client.head('/')
+        if response.status_code != 200:
+            print(f"❌ Home page failed: {response.status_code}")
+            return False
+        
+        # Test login page
+        response = client.head('/login')
+        if response.status_code != 200:
+            print(f"❌ Login page failed: {response.status_code}")
+            return False
+        
+        # Test admin routes (should redirect to login)
+        response = client.head('/admin/dashboard')
+        if response.status_code not in [302, 401, 403]:
+            print(f"❌ Admin protection failed: {response.status_code}")
+            return False
         
         print("✅ Web application endpoints working")
         return True
@@ -133,6 +201,13 @@ def test_location_matching():
             print("❌ Distance calculation failed")
             return False
         
+        # Test batched distance calculation over synthetic footage points
+        offsets = np.linspace(-0.5, 0.5, 1000)
+        distances = ai_matcher.calculate_distance_batch(28.6139, 77.2090, 28.6139 + offsets, 77.2090 + offsets)
+        if distances.shape != offsets.shape or not np.all(np.isfinite(distances)) or np.any(distances < 0):
+            print("❌ Batch distance calculation failed")
+            return False
+        
         print(f"✅ Location matching working (test distance: {distance:.2f} km)")
         return True
     except Exception as e:
@@ -143,7 +218,7 @@ def test_security_features():
     """Test security features"""
     print("🔒 Testing security features...")
     try:
-        app = create_app()
+        app = get_app()
         
         # Test CSRF protection
         csrf_enabled = app.config.get('WTF_CSRF_ENABLED', False)
@@ -163,9 +238,7 @@ def test_security_features():
 
 def generate_test_report():
     """Generate comprehensive test report"""
-    print("\n" + "="*60)
-    print("🧪 SYSTEM TEST REPORT")
-    print("="*60)
+    sys.stdout.write(REPORT_HEADER)
     
     tests = [
         ("Database Connection", test_database_connection),
@@ -177,33 +250,42 @@ def generate_test_report():
         ("Security Features", test_security_features)
     ]
     
-    results = []
-    for test_name, test_func in tests:
-        print(f"\n🔍 Running {test_name} test...")
-        result = test_func()
-        results.append((test_name, result))
-    
-    print("\n" + "="*60)
-    print("📊 TEST SUMMARY")
-    print("="*60)
+    # The tests are independent and mostly wait on I/O, so run them
+    # concurrently and replay each one's output in order afterwards
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [(test_name, executor.submit(output.run_captured, test_func))
+                       for test_name, test_func in tests]
+            
+            results = []
+            for test_name, future in futures:
+                result, captured = future.result()
+                print(f"\n🔍 Running {test_name} test...")
+                print(captured, end="")
+                results.append((test_name, result))
+    finally:
+        sys.stdout = output._stream
     
-    passed = 0
+    passed = sum(1 for _, result in results if result)
     total = len(results)
     
+    # Build the whole summary in memory and write it once
+    report = io.StringIO()
+    report.write(SUMMARY_HEADER)
     for test_name, result in results:
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{test_name:<20} {status}")
-        if result:
-            passed += 1
-    
-    print(f"\nResults: {passed}/{total} tests passed")
+        report.write(SUMMARY_LINE.format(test_name, PASS_LABEL if result else FAIL_LABEL))
+    report.write(SUMMARY_RESULTS.format(passed, total))
     
     if passed == total:
-        print("🎉 All tests passed! System is ready for production.")
+        report.write("🎉 All tests passed! System is ready for production.\n")
     elif passed >= total * 0.8:
-        print("⚠️  Most tests passed. Review failed tests before deployment.")
+        report.write("⚠️  Most tests passed. Review failed tests before deployment.\n")
     else:
-        print("❌ Multiple tests failed. System needs attention before deployment.")
+        report.write("❌ Multiple tests failed. System needs attention before deployment.\n")
+    
+    sys.stdout.write(report.getvalue())
     
     return passed == total
 
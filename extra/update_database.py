@@ -11,38 +11,145 @@ from flask_sqlalchemy import SQLAlchemy
 # Add app directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Columns added to the "case" table, as (name, SQL type)
+NEW_COLUMNS = (
+    ('last_seen_time', 'TIME'),
+    ('contact_address', 'TEXT'),
+    ('sightings_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('high_conf_sightings_count', 'INTEGER NOT NULL DEFAULT 0'),
+)
+
+# Fills the denormalized sighting counters from the sighting table; run
+# when the counter columns are first added. 204 is 0.8 in QuantizedScore steps
+BACKFILL_SIGHTING_COUNTS = """
+    UPDATE "case" SET
+        sightings_count = (
+            SELECT COUNT(*) FROM sighting WHERE sighting.case_id = "case".id
+        ),
+        high_conf_sightings_count = (
+            SELECT COUNT(*) FROM sighting
+            WHERE sighting.case_id = "case".id AND sighting.confidence_score > 204
+        )
+"""
+
+# PRAGMA user_version set by earlier versions of this script after they
+# quantized SQLite score values in place, leaving the columns typed FLOAT
+QUANTIZED_SCORES_VERSION = 1
+
+# Indexes older versions created that no query uses any more
+DROPPED_INDEXES = (
+    'ix_sighting_case_created', 'ix_chat_message_room_created', 'ix_footage_lat_lng',
+)
+
+# Bump when NEW_COLUMNS or the model indexes change so existing markers are ignored
+SCHEMA_VERSION = 13
+
+def sqlite_database_path():
+    """Return the SQLite database file path, or None for other databases"""
+    from config import Config
+    
+    uri = Config.SQLALCHEMY_DATABASE_URI
+    if not uri.startswith('sqlite:///'):
+        return None
+    return uri[len('sqlite:///'):]
+
+def convert_score_column(conn, table, column, nullable, already_steps):
+    """
+    Retype a float score column as SMALLINT 1/255 steps (models.QuantizedScore).
+    Runs only for columns still declared as floats, so it never repeats
+    """
+    from app import db
+    
+    factor = 1 if already_steps else 255
+    if conn.dialect.name == 'postgresql':
+        conn.execute(db.text(
+            f'ALTER TABLE {table} ALTER COLUMN {column} TYPE SMALLINT '
+            f'USING ROUND({column} * {factor})'
+        ))
+        return
+    
+    # SQLite can't change a column's type (needs 3.35+ for DROP COLUMN):
+    # move the floats aside, fill a new column from them and drop the old
+    # one. Its indexes go first and are recreated from the models later
+    for index in db.inspect(conn).get_indexes(table):
+        if column in index['column_names']:
+            conn.execute(db.text(f'DROP INDEX {index["name"]}'))
+    not_null = '' if nullable else ' NOT NULL DEFAULT 0'
+    conn.execute(db.text(f'ALTER TABLE {table} RENAME COLUMN {column} TO {column}_float'))
+    conn.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} SMALLINT{not_null}'))
+    conn.execute(db.text(
+        f'UPDATE {table} SET {column} = CAST(ROUND({column}_float * {factor}) AS INTEGER) '
+        f'WHERE {column}_float IS NOT NULL'
+    ))
+    conn.execute(db.text(f'ALTER TABLE {table} DROP COLUMN {column}_float'))
+
 def update_database():
     """Add new fields to existing database"""
     
     print("Updating Missing Person AI Database...")
     
     try:
+        # Warm runs: a marker next to the database proves the columns exist,
+        # so skip building the app and the PRAGMA lookup entirely
+        db_path = sqlite_database_path()
+        marker = f"{db_path}.schema_v{SCHEMA_VERSION}" if db_path else None
+        if marker and os.path.exists(marker) and os.path.exists(db_path):
+            print("Database schema already up to date")
+            return True
+        
         from app import create_app, db
+        from app.models import unconverted_score_columns
+        from config import Config
         
-        app = create_app()
+        # The app refuses to start on unconverted score columns; this script
+        # is what converts them
+        class UpdateConfig(Config):
+            CHECK_SCORE_SCHEMA = False
+        
+        app = create_app(UpdateConfig)
         
         with app.app_context():
             # Add new columns to existing table
             try:
-                # Check if columns already exist
-                with db.engine.connect() as conn:
-                    result = conn.execute(db.text('PRAGMA table_info("case")'))
-                    columns = [row[1] for row in result]
+                # Check if columns already exist; all ALTERs share one transaction
+                with db.engine.begin() as conn:
+                    columns = frozenset(
+                        column['name'] for column in db.inspect(conn).get_columns('case')
+                    )
+                    
+                    # Score columns are converted by type, not by guessing at
+                    # values; the app can't write steps into them until then
+                    already_steps = (
+                        conn.dialect.name == 'sqlite'
+                        and conn.execute(db.text('PRAGMA user_version')).scalar() >= QUANTIZED_SCORES_VERSION
+                    )
+                    for table, column in unconverted_score_columns(conn):
+                        nullable = db.metadata.tables[table].c[column].nullable
+                        convert_score_column(conn, table, column, nullable, already_steps)
+                        print(f"Converted {table}.{column} to quantized steps")
+                    
+                    for column, column_type in NEW_COLUMNS:
+                        if column not in columns:
+                            conn.execute(db.text(f'ALTER TABLE "case" ADD COLUMN {column} {column_type}'))
+                            print(f"Added {column} column")
+                        else:
+                            print(f"{column} column already exists")
+                    
+                    if 'sightings_count' not in columns:
+                        conn.execute(db.text(BACKFILL_SIGHTING_COUNTS))
+                        print("Backfilled sighting counters")
                     
-                    if 'last_seen_time' not in columns:
-                        conn.execute(db.text('ALTER TABLE "case" ADD COLUMN last_seen_time TIME'))
-                        conn.commit()
-                        print("Added last_seen_time column")
-                    else:
-                        print("last_seen_time column already exists")
+                    for index_name in DROPPED_INDEXES:
+                        conn.execute(db.text(f'DROP INDEX IF EXISTS {index_name}'))
                     
-                    if 'contact_address' not in columns:
-                        conn.execute(db.text('ALTER TABLE "case" ADD COLUMN contact_address TEXT'))
-                        conn.commit()
-                        print("Added contact_address column")
-                    else:
-                        print("contact_address column already exists")
+                    # Indexes declared on the models are only created with
+                    # new tables, so add any an older database is missing
+                    for table in db.metadata.sorted_tables:
+                        for index in table.indexes:
+                            index.create(conn, checkfirst=True)
                 
+                if marker:
+                    open(marker, 'w').close()
                 print("Database updated successfully!")
                 
             except Exception as e:
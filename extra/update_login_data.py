@@ -6,7 +6,7 @@ Update existing users with login data for testing
 import os
 import sys
 from datetime import datetime, timedelta
-import random
+import numpy as np
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -14,40 +14,59 @@ def update_user_login_data():
     """Update existing users with realistic login data"""
     
     try:
+        from sqlalchemy import select
         from app import create_app, db
         from app.models import User
         
         app = create_app()
         
         with app.app_context():
-            users = User.query.all()
-            
-            for user in users:
-                # Generate realistic login data
-                if user.username == 'admin':
-                    # Admin user - recent activity
-                    user.last_login = datetime.utcnow() - timedelta(hours=2)
-                    user.login_count = random.randint(15, 30)
-                else:
-                    # Regular users - varied activity
-                    days_ago = random.randint(1, 7)
-                    hours_ago = random.randint(1, 24)
-                    user.last_login = datetime.utcnow() - timedelta(days=days_ago, hours=hours_ago)
-                    user.login_count = random.randint(3, 15)
+            # Nothing here reads ORM state back, so never autoflush
+            with db.session.no_autoflush:
+                # Only the key and username are needed to build the new values
+                users = db.session.execute(select(User.id, User.username)).all()
+                now = datetime.utcnow()
                 
-                user.is_active = True
+                # Draw every random value up front; inclusive ranges as before
+                rng = np.random.default_rng()
+                count = len(users)
+                days_ago = rng.integers(1, 8, size=count).tolist()
+                hours_ago = rng.integers(1, 25, size=count).tolist()
+                admin_logins = rng.integers(15, 31, size=count).tolist()
+                user_logins = rng.integers(3, 16, size=count).tolist()
                 
-            db.session.commit()
-            print(f"Updated login data for {len(users)} users")
-            
-            # Display updated data
-            for user in users:
-                print(f"User: {user.username}")
-                print(f"  Last Login: {user.last_login}")
-                print(f"  Login Count: {user.login_count}")
-                print(f"  Active: {user.is_active}")
-                print()
+                mappings = []
+                for i, (user_id, username) in enumerate(users):
+                    # Generate realistic login data
+                    if username == 'admin':
+                        # Admin user - recent activity
+                        last_login = now - timedelta(hours=2)
+                        login_count = admin_logins[i]
+                    else:
+                        # Regular users - varied activity
+                        last_login = now - timedelta(days=days_ago[i], hours=hours_ago[i])
+                        login_count = user_logins[i]
+                    
+                    mappings.append({
+                        'id': user_id,
+                        'last_login': last_login,
+                        'login_count': login_count,
+                        'is_active': True
+                    })
                 
+                # One executemany UPDATE instead of a flush per ORM object
+                db.session.bulk_update_mappings(User, mappings)
+                db.session.commit()
+                print(f"Updated login data for {len(mappings)} users")
+                
+                # Display updated data from the values written, not a reload
+                for (_, username), mapping in zip(users, mappings):
+                    print(f"User: {username}")
+                    print(f"  Last Login: {mapping['last_login']}")
+                    print(f"  Login Count: {mapping['login_count']}")
+                    print(f"  Active: {mapping['is_active']}")
+                    print()
+    
     except Exception as e:
         print(f"Error updating login data: {e}")
         return False
@@ -5,75 +5,46 @@ Tests if all required packages can be imported successfully
 """
 
 import sys
-import importlib
-import subprocess
+
+from _requirements_data import PACKAGES, find_module, find_modules
+
+# Derived once at import: the names to look up and the column width
+IMPORT_NAMES = tuple(import_name for _, import_name in PACKAGES)
+NAME_WIDTH = max(len(package_name) for package_name, _ in PACKAGES)
 
 def test_import(package_name, import_name=None):
-    """Test if a package can be imported"""
+    """Test if a package can be found without importing it"""
     if import_name is None:
         import_name = package_name.replace('-', '_')
     
-    try:
-        importlib.import_module(import_name)
-        print(f"[OK] {package_name}")
-        return True
-    except ImportError as e:
-        print(f"[ERROR] {package_name}: {str(e)}")
-        return False
+    error = find_module(import_name)
+    return report(package_name, error)
+
+def report(package_name, error):
+    """Print the result for one package and return whether it passed"""
+    sys.stdout.write(format_result(package_name, error))
+    return error is None
+
+def format_result(package_name, error):
+    """Format the result line for one package"""
+    if error is None:
+        return f"[OK]    {package_name}\n"
+    return f"[ERROR] {package_name:<{NAME_WIDTH}}  {error}\n"
 
 def main():
     print("="*60)
     print(" Requirements Validation Test")
     print("="*60)
     
-    # Core packages to test
-    packages_to_test = [
-        ('flask', 'flask'),
-        ('flask-sqlalchemy', 'flask_sqlalchemy'),
-        ('flask-migrate', 'flask_migrate'),
-        ('flask-wtf', 'flask_wtf'),
-        ('flask-login', 'flask_login'),
-        ('flask-bcrypt', 'flask_bcrypt'),
-        ('flask-moment', 'flask_moment'),
-        ('python-dotenv', 'dotenv'),
-        ('werkzeug', 'werkzeug'),
-        ('celery', 'celery'),
-        ('redis', 'redis'),
-        ('opencv-python', 'cv2'),
-        ('face-recognition', 'face_recognition'),
-        ('dlib', 'dlib'),
-        ('PIL', 'PIL'),
-        ('numpy', 'numpy'),
-        ('scikit-learn', 'sklearn'),
-        ('scipy', 'scipy'),
-        ('matplotlib', 'matplotlib'),
-        ('geopy', 'geopy'),
-        ('folium', 'folium'),
-        ('geojson', 'geojson'),
-        ('psycopg2-binary', 'psycopg2'),
-        ('alembic', 'alembic'),
-        ('WTForms', 'wtforms'),
-        ('email-validator', 'email_validator'),
-        ('validators', 'validators'),
-        ('itsdangerous', 'itsdangerous'),
-        ('markupsafe', 'markupsafe'),
-        ('bleach', 'bleach'),
-        ('cryptography', 'cryptography'),
-        ('filetype', 'filetype'),
-        ('requests', 'requests'),
-        ('pytz', 'pytz'),
-        ('python-dateutil', 'dateutil'),
-        ('gunicorn', 'gunicorn')
-    ]
-    
-    passed = 0
-    failed = 0
+    # find_spec only consults the import finders, so nothing is imported
+    errors = find_modules(IMPORT_NAMES)
+    sys.stdout.write("".join(
+        format_result(package_name, error)
+        for (package_name, _), error in zip(PACKAGES, errors)
+    ))
     
-    for package_name, import_name in packages_to_test:
-        if test_import(package_name, import_name):
-            passed += 1
-        else:
-            failed += 1
+    failed = sum(error is not None for error in errors)
+    passed = len(errors) - failed
     
     print(f"\n" + "="*60)
     print(f" Results: {passed} passed, {failed} failed")
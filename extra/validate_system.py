@@ -4,24 +4,65 @@ System Validation Script
 Tests all components and dependencies
 """
 
+import shlex
 import sys
-import importlib
 import subprocess
 
+from _requirements_data import DEPENDENCIES, find_module, find_modules
+
 def test_import(module_name, description=""):
-    """Test if a module can be imported"""
-    try:
-        importlib.import_module(module_name)
+    """Test if a module can be found without importing it"""
+    return report_import(module_name, description, find_module(module_name))
+
+def test_imports(tests, failed):
+    """Test a group of (module, description) pairs, skipping dependents of failures"""
+    # Probe concurrently in waves so prerequisites in the same group resolve
+    # first; every failed or skipped module is added to failed
+    errors = {}
+    skipped = {}
+    pending = [module for module, _ in tests]
+    while pending:
+        ready = [m for m in pending if not any(dep in pending for dep in DEPENDENCIES.get(m, ()))]
+        ready = ready or pending
+        
+        probe = []
+        for module in ready:
+            missing = [dep for dep in DEPENDENCIES.get(module, ()) if dep in failed]
+            if missing:
+                skipped[module] = missing
+                failed.add(module)
+            else:
+                probe.append(module)
+        
+        for module, error in zip(probe, find_modules(probe)):
+            errors[module] = error
+            if error is not None:
+                failed.add(module)
+        
+        pending = [m for m in pending if m not in ready]
+    
+    passed = 0
+    for module, desc in tests:
+        if module in skipped:
+            print(f"[SKIP] {module} - {desc} - requires {', '.join(skipped[module])}")
+        else:
+            passed += report_import(module, desc, errors[module])
+    return passed
+
+def report_import(module_name, description, error):
+    """Print the result for one module and return whether it passed"""
+    if error is None:
         print(f"[OK] {module_name} - {description}")
         return True
-    except ImportError as e:
-        print(f"[FAIL] {module_name} - {description} - Error: {e}")
-        return False
+    print(f"[FAIL] {module_name} - {description} - Error: {error}")
+    return False
 
 def test_command(command, description=""):
-    """Test if a command works"""
+    """Test if a command works; command is an argv list or a string to split"""
+    argv = shlex.split(command) if isinstance(command, str) else command
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        # No shell: the argv is executed directly
+        result = subprocess.run(argv, capture_output=True, text=True, check=False, timeout=5)
         if result.returncode == 0:
             print(f"[OK] {description}")
             return True
@@ -32,11 +73,14 @@ def test_command(command, description=""):
         print(f"[FAIL] {description} - Error: {e}")
         return False
 
-def main():
+def main(deep=False):
     """Main validation function"""
     print("Missing Person AI - System Validation")
     print("=" * 50)
     
+    # Modules that failed or were skipped; their dependents are skipped
+    failed = set()
+    
     # Test core dependencies
     print("\nCore Dependencies:")
     core_tests = [
@@ -50,7 +94,7 @@ def main():
         ("redis", "Cache and message broker"),
     ]
     
-    core_passed = sum(test_import(module, desc) for module, desc in core_tests)
+    core_passed = test_imports(core_tests, failed)
     
     # Test AI dependencies
     print("\nAI Dependencies:")
@@ -65,7 +109,7 @@ def main():
         ("matplotlib", "Plotting library"),
     ]
     
-    ai_passed = sum(test_import(module, desc) for module, desc in ai_tests)
+    ai_passed = test_imports(ai_tests, failed)
     
     # Test location dependencies
     print("\nLocation Dependencies:")
@@ -75,7 +119,7 @@ def main():
         ("geojson", "GeoJSON support"),
     ]
     
-    location_passed = sum(test_import(module, desc) for module, desc in location_tests)
+    location_passed = test_imports(location_tests, failed)
     
     # Test database
     print("\nDatabase:")
@@ -85,7 +129,7 @@ def main():
         ("sqlalchemy", "SQL toolkit"),
     ]
     
-    db_passed = sum(test_import(module, desc) for module, desc in db_tests)
+    db_passed = test_imports(db_tests, failed)
     
     # Test utilities
     print("\nUtilities:")
@@ -99,26 +143,36 @@ def main():
         ("jinja2", "Template engine"),
     ]
     
-    util_passed = sum(test_import(module, desc) for module, desc in util_tests)
+    util_passed = test_imports(util_tests, failed)
     
-    # Test face recognition functionality
+    # Test face recognition functionality; this imports dlib, so only on --deep
     print("\nFace Recognition Test:")
-    try:
-        import face_recognition
-        import numpy as np
-        from PIL import Image
-        
-        # Create a test image
-        test_image = np.zeros((100, 100, 3), dtype=np.uint8)
-        face_locations = face_recognition.face_locations(test_image)
-        print("[OK] Face recognition functionality working")
-        face_test_passed = 1
-    except Exception as e:
-        print(f"[FAIL] Face recognition test failed: {e}")
+    if deep and 'face_recognition' in failed:
+        print("[SKIP] face_recognition is not available")
+        face_test_passed = 0
+        face_tests = 1
+    elif deep:
+        try:
+            import face_recognition
+            import numpy as np
+            from PIL import Image
+            
+            # Create a test image
+            test_image = np.zeros((100, 100, 3), dtype=np.uint8)
+            face_locations = face_recognition.face_locations(test_image)
+            print("[OK] Face recognition functionality working")
+            face_test_passed = 1
+        except Exception as e:
+            print(f"[FAIL] Face recognition test failed: {e}")
+            face_test_passed = 0
+        face_tests = 1
+    else:
+        print("[SKIP] Run with --deep to exercise face recognition")
         face_test_passed = 0
+        face_tests = 0
     
     # Summary
-    total_tests = len(core_tests) + len(ai_tests) + len(location_tests) + len(db_tests) + len(util_tests) + 1
+    total_tests = len(core_tests) + len(ai_tests) + len(location_tests) + len(db_tests) + len(util_tests) + face_tests
     total_passed = core_passed + ai_passed + location_passed + db_passed + util_passed + face_test_passed
     
     print("\n" + "=" * 50)
@@ -141,5 +195,5 @@ def main():
     return total_passed == total_tests
 
 if __name__ == "__main__":
-    success = main()
+    success = main(deep='--deep' in sys.argv[1:])
     sys.exit(0 if success else 1)
\ No newline at end of file
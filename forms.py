@@ -14,6 +14,7 @@ from wtforms import (
     MultipleFileField
 )
 from wtforms.validators import DataRequired, Optional, Email, EqualTo, Length, ValidationError, NumberRange, Regexp
+from app import db
 from app.models import User
 
 # Custom file validators
@@ -48,13 +49,13 @@ class RegistrationForm(FlaskForm):
     submit = SubmitField('Register')
     
     def validate_username(self, username):
-        user = User.query.filter_by(username=username.data).first()
-        if user:
+        taken = db.session.query(User.query.filter_by(username=username.data).exists()).scalar()
+        if taken:
             raise ValidationError('Username already taken')
     
     def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
-        if user:
+        taken = db.session.query(User.query.filter_by(email=email.data).exists()).scalar()
+        if taken:
             raise ValidationError('Email already registered')
 
 class LoginForm(FlaskForm):
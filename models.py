@@ -1,14 +1,21 @@
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime, timedelta, timezone
+import functools
+import hashlib
+import os
+import threading
+from zoneinfo import ZoneInfo
+from cachetools import TTLCache
 from flask_login import UserMixin
 from flask_bcrypt import generate_password_hash, check_password_hash
-from itsdangerous import URLSafeTimedSerializer
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from flask import current_app
+from sqlalchemy.dialects.postgresql import JSONB
 from app import db
 from app.utils import sanitize_input
 
-# IST timezone
-IST = pytz.timezone('Asia/Kolkata')
+# Timezones, resolved once; zoneinfo needs no localize() step
+IST = ZoneInfo('Asia/Kolkata')
+UTC = timezone.utc
 
 def get_ist_now():
     """Get current time in IST"""
@@ -20,10 +27,150 @@ def utc_to_ist(utc_dt):
         return None
     if utc_dt.tzinfo is None:
         # Assume UTC if no timezone info
-        utc_dt = pytz.UTC.localize(utc_dt)
+        utc_dt = utc_dt.replace(tzinfo=UTC)
     return utc_dt.astimezone(IST)
 
 
+# Unread counters are read on every page (navbar badge, chat list) but only
+# change when a notification or chat message is written, so cache them
+# briefly and drop the entry whenever a write touches it
+_unread_counts = TTLCache(maxsize=4096, ttl=60)
+_unread_counts_lock = threading.Lock()
+
+def _cached_unread_count(key, query):
+    """Return a cached unread count, running the count query on a miss"""
+    with _unread_counts_lock:
+        count = _unread_counts.get(key)
+    if count is None:
+        count = query.count()
+        with _unread_counts_lock:
+            _unread_counts[key] = count
+    return count
+
+def invalidate_unread_counts(user_id=None, chat_room_id=None):
+    """Drop cached unread counts after notifications or chat messages change"""
+    with _unread_counts_lock:
+        if user_id is not None:
+            _unread_counts.pop(("notifications", user_id), None)
+        if chat_room_id is not None:
+            _unread_counts.pop(("chat_room", chat_room_id, "user"), None)
+            _unread_counts.pop(("chat_room", chat_room_id, "admin"), None)
+
+
+# Recently failed password checks. A repeated wrong password for the same
+# account is rejected without running bcrypt again. Entries are keyed on
+# the stored hash too, so changing the password can never reuse them, and
+# passwords are only kept as digests under a per-process random key
+_failed_logins = TTLCache(maxsize=1024, ttl=60)
+_failed_logins_lock = threading.Lock()
+_FAILED_LOGIN_KEY = os.urandom(32)
+
+def _failed_login_key(user, password):
+    digest = hashlib.blake2b(password.encode("utf-8"), key=_FAILED_LOGIN_KEY).digest()
+    return user.id, user.password_hash, digest
+
+
+# The admin new chat rooms are assigned to. Admins are rarely added or
+# removed, so the lookup is cached until a user's admin flag changes
+_default_admin = TTLCache(maxsize=1, ttl=300)
+_default_admin_lock = threading.Lock()
+_NOT_CACHED = object()
+
+
+# Display formatting for video offsets and sizes. Templates render these for
+# every row, and the same whole-second values repeat, so memoize them
+@functools.lru_cache(maxsize=8192)
+def _fmt_mmss(seconds):
+    """Format whole seconds as MM:SS"""
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+@functools.lru_cache(maxsize=8192)
+def _fmt_hhmmss(seconds):
+    """Format whole seconds as HH:MM:SS, or MM:SS under an hour"""
+    if seconds >= 3600:
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return _fmt_mmss(seconds)
+
+# (divisor, format) indexed by (bit_length - 1) // 10, i.e. the power of 1024.
+# Plain bytes are printed as the integer, without a decimal
+_FILE_SIZE_TABLE = (
+    (1, "{} B"),
+    (1024, "{:.1f} KB"),
+    (1024 ** 2, "{:.1f} MB"),
+    (1024 ** 3, "{:.1f} GB"),
+)
+
+def _fmt_file_size(size):
+    """Format a byte count with a B/KB/MB/GB suffix"""
+    divisor, fmt = _FILE_SIZE_TABLE[min((size.bit_length() - 1) // 10, 3)]
+    return fmt.format(size / divisor if divisor > 1 else size)
+
+
+class QuantizedScore(db.TypeDecorator):
+    """A 0.0-1.0 score stored as an integer number of 1/255 steps. Scores
+    only need two or three decimals, and comparisons such as
+    "score > 0.8" are quantized the same way, so filters stay indexable"""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    @staticmethod
+    def steps(value):
+        """The stored integer step for a 0.0-1.0 score"""
+        return min(max(round(float(value) * 255), 0), 255)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self.steps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # Three decimals is finer than a step, so steps() maps it back exactly
+        return round(value / 255, 3)
+
+
+def unconverted_score_columns(connection):
+    """
+    (table, column) pairs of QuantizedScore columns that the database still
+    declares as floats. Steps written into such a column can't be told
+    apart from the old scores, so the app refuses to start until
+    extra/update_database.py has converted them
+    """
+    inspector = db.inspect(connection)
+    pending = []
+    for table in db.metadata.sorted_tables:
+        score_columns = [c.name for c in table.columns if isinstance(c.type, QuantizedScore)]
+        if not score_columns or not inspector.has_table(table.name):
+            continue
+        stored_types = {col["name"]: col["type"] for col in inspector.get_columns(table.name)}
+        for column in score_columns:
+            stored_type = stored_types.get(column)
+            if stored_type is not None and not isinstance(stored_type, db.Integer):
+                pending.append((table.name, column))
+    return pending
+
+
+# JSON documents: JSONB on PostgreSQL (indexable, decoded server-side),
+# SQLAlchemy's generic JSON (stored as text) everywhere else
+JSONDocument = db.JSON().with_variant(JSONB(), "postgresql")
+
+
+# Closed value sets for status-like columns. They map to native ENUM types
+# on PostgreSQL and to plain VARCHARs elsewhere; values stay strings
+CASE_STATUSES = (
+    "Pending Approval", "Approved", "Rejected", "Queued", "Processing",
+    "Active", "Completed", "Resolved", "Withdrawn", "Error",
+)
+CASE_PRIORITIES = ("Low", "Medium", "High", "Critical")
+VIDEO_STATUSES = ("Pending", "Processing", "Completed", "Failed")
+MESSAGE_STATUSES = ("sent", "delivered", "seen")
+MATCH_STATUSES = ("pending", "processing", "completed", "failed")
+
+# Statuses the analysis workers poll for
+WORKER_QUEUE_STATUSES = "('Queued', 'Processing', 'Active')"
+
+
 class Case(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     person_name = db.Column(db.String(100), nullable=False)
@@ -33,18 +180,41 @@ class Case(db.Model):
     last_seen_location = db.Column(db.String(200))
     last_seen_time = db.Column(db.Time)  # Optional time field
     contact_address = db.Column(db.Text)  # Contact person address
-    date_missing = db.Column(db.DateTime, default=datetime.utcnow)
+    date_missing = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     status = db.Column(
-        db.String(20), default="Pending Approval"
-    )  # Pending Approval, Approved, Queued, Processing, Active, Resolved, Withdrawn
-    priority = db.Column(db.String(10), default="Medium")  # Low, Medium, High, Critical
+        db.Enum(*CASE_STATUSES, name="case_status", length=20), default="Pending Approval"
+    )
+    priority = db.Column(
+        db.Enum(*CASE_PRIORITIES, name="case_priority", length=10), default="Medium"
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     assigned_to = db.Column(db.Integer, db.ForeignKey("user.id"))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        db.DateTime, default=db.func.now(), server_default=db.func.now(), onupdate=db.func.now()
     )
     completed_at = db.Column(db.DateTime)
+    # Denormalized counters, maintained by the Sighting event listeners
+    sightings_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    high_conf_sightings_count = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
+    total_sightings = db.synonym("sightings_count")
+    high_confidence_sightings = db.synonym("high_conf_sightings_count")
+
+    __table_args__ = (
+        db.Index("ix_case_status_user", "status", "user_id"),
+        # A user's cases newest first (dashboard, profile) straight off the
+        # index; id breaks ties between cases created in the same second
+        db.Index("ix_case_user_created", "user_id", "created_at", "id"),
+        # Partial: only the handful of cases the workers are interested in
+        db.Index(
+            "ix_case_worker_queue",
+            "status",
+            postgresql_where=db.text(f"status IN {WORKER_QUEUE_STATUSES}"),
+            sqlite_where=db.text(f"status IN {WORKER_QUEUE_STATUSES}"),
+        ),
+    )
 
     # Relationships
     target_images = db.relationship(
@@ -67,14 +237,6 @@ class Case(db.Model):
         safe_name = sanitize_input(self.person_name) if self.person_name else 'Unknown'
         return f"<Case {safe_name} - {self.status}>"
 
-    @property
-    def total_sightings(self):
-        return len(self.sightings)
-
-    @property
-    def high_confidence_sightings(self):
-        return len([s for s in self.sightings if s.confidence_score > 0.8])
-
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -82,7 +244,7 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
 
     # Enhanced user fields
     last_login = db.Column(db.DateTime)
@@ -90,7 +252,7 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)
     location = db.Column(db.String(200))
     is_online = db.Column(db.Boolean, default=False)
-    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     # Relationships with cascade delete
     cases = db.relationship(
@@ -103,13 +265,37 @@ class User(UserMixin, db.Model):
     @property
     def unread_notifications_count(self):
         """Get count of unread notifications for this user"""
-        return Notification.query.filter_by(user_id=self.id, is_read=False).count()
+        return _cached_unread_count(
+            ("notifications", self.id),
+            Notification.query.filter_by(user_id=self.id, is_read=False)
+        )
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password).decode("utf-8")
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        key = _failed_login_key(self, password)
+        with _failed_logins_lock:
+            if key in _failed_logins:
+                return False
+        if check_password_hash(self.password_hash, password):
+            return True
+        with _failed_logins_lock:
+            _failed_logins[key] = True
+        return False
+
+    @staticmethod
+    def default_admin_id():
+        """Id of the admin that new user chat rooms go to, or None"""
+        with _default_admin_lock:
+            admin_id = _default_admin.get("id", _NOT_CACHED)
+        if admin_id is _NOT_CACHED:
+            admin_id = db.session.execute(
+                db.select(User.id).filter_by(is_admin=True).order_by(User.id).limit(1)
+            ).scalar()
+            with _default_admin_lock:
+                _default_admin["id"] = admin_id
+        return admin_id
 
     def generate_reset_token(self, expires_sec=1800):
         s = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
@@ -120,9 +306,23 @@ class User(UserMixin, db.Model):
         s = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
         try:
             user_id = s.loads(token, max_age=expires_sec)["user_id"]
-        except:
+        except (BadSignature, KeyError, TypeError):
+            # BadSignature covers SignatureExpired as well
             return None
-        return User.query.get(user_id)
+        # Password reset only needs to identify the account
+        return db.session.get(
+            User, user_id, options=[db.load_only(User.id, User.is_active, User.email)]
+        )
+
+
+@db.event.listens_for(User, "after_insert")
+@db.event.listens_for(User, "after_update")
+@db.event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    state = db.inspect(target)
+    if state.attrs.is_admin.history.has_changes() or target.is_admin:
+        with _default_admin_lock:
+            _default_admin.clear()
 
 
 class TargetImage(db.Model):
@@ -134,7 +334,7 @@ class TargetImage(db.Model):
     )  # front, side, back, full_body
     description = db.Column(db.String(200))
     is_primary = db.Column(db.Boolean, default=False)
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    uploaded_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
 
     def __repr__(self):
         return f"<TargetImage {self.image_type} for Case {self.case_id}>"
@@ -151,10 +351,10 @@ class SearchVideo(db.Model):
     resolution = db.Column(db.String(20))
     file_size = db.Column(db.BigInteger)  # in bytes
     status = db.Column(
-        db.String(20), default="Pending"
-    )  # Pending, Processing, Completed, Failed
+        db.Enum(*VIDEO_STATUSES, name="video_status", length=20), default="Pending"
+    )
     processed_at = db.Column(db.DateTime)
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    uploaded_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
 
     # Relationships
     sightings = db.relationship("Sighting", backref="search_video", lazy=True)
@@ -172,27 +372,70 @@ class Sighting(db.Model):
     )
     video_name = db.Column(db.String(100), nullable=False)
     timestamp = db.Column(db.Float, nullable=False)  # timestamp in video (seconds)
-    confidence_score = db.Column(db.Float, nullable=False)  # combined confidence
-    face_score = db.Column(db.Float)
-    clothing_score = db.Column(db.Float)
+    confidence_score = db.Column(QuantizedScore, nullable=False)  # combined confidence
+    face_score = db.Column(QuantizedScore)
+    clothing_score = db.Column(QuantizedScore)
     detection_method = db.Column(
         db.String(20), nullable=False
     )  # face, clothing, multi_modal
     thumbnail_path = db.Column(db.String(200))
-    bounding_box = db.Column(db.Text)  # JSON string of coordinates
+    bounding_box = db.Column(JSONDocument)  # coordinates
     verified = db.Column(db.Boolean, default=False)
     verified_by = db.Column(db.Integer, db.ForeignKey("user.id"))
     notes = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index("ix_sighting_case_conf", "case_id", "confidence_score"),
+        db.Index(
+            "ix_sighting_bbox_gin", "bounding_box", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     def __repr__(self):
         return f"<Sighting Case {self.case_id} at {self.timestamp}s - {self.confidence_score:.2f}>"
 
     @property
     def formatted_timestamp(self):
-        minutes = int(self.timestamp // 60)
-        seconds = int(self.timestamp % 60)
-        return f"{minutes:02d}:{seconds:02d}"
+        return _fmt_mmss(int(self.timestamp))
+
+
+# Sighting counters on Case are kept in step with every Sighting written
+# through the ORM, so listings read two integers instead of aggregating
+# The threshold is compared in stored steps, as SQL filters on the column
+# are, so a score counts the same before and after it round-trips
+HIGH_CONFIDENCE_THRESHOLD = 0.8
+HIGH_CONFIDENCE_STEPS = QuantizedScore.steps(HIGH_CONFIDENCE_THRESHOLD)
+
+def _adjust_sighting_counts(connection, case_id, confidence_score, delta):
+    """Add delta to a case's sighting counters"""
+    case_table = Case.__table__
+    values = {"sightings_count": case_table.c.sightings_count + delta}
+    if confidence_score is not None and QuantizedScore.steps(confidence_score) > HIGH_CONFIDENCE_STEPS:
+        values["high_conf_sightings_count"] = case_table.c.high_conf_sightings_count + delta
+    connection.execute(
+        db.update(case_table).where(case_table.c.id == case_id).values(**values)
+    )
+
+@db.event.listens_for(Sighting, "after_insert")
+def _sighting_inserted(mapper, connection, target):
+    _adjust_sighting_counts(connection, target.case_id, target.confidence_score, 1)
+
+@db.event.listens_for(Sighting, "after_delete")
+def _sighting_deleted(mapper, connection, target):
+    _adjust_sighting_counts(connection, target.case_id, target.confidence_score, -1)
+
+@db.event.listens_for(Sighting, "after_update")
+def _sighting_updated(mapper, connection, target):
+    state = db.inspect(target)
+    case_history = state.attrs.case_id.history
+    score_history = state.attrs.confidence_score.history
+    if not (case_history.deleted or score_history.deleted):
+        return
+    old_case = case_history.deleted[0] if case_history.deleted else target.case_id
+    old_score = score_history.deleted[0] if score_history.deleted else target.confidence_score
+    _adjust_sighting_counts(connection, old_case, old_score, -1)
+    _adjust_sighting_counts(connection, target.case_id, target.confidence_score, 1)
 
 
 class CaseNote(db.Model):
@@ -204,7 +447,7 @@ class CaseNote(db.Model):
     )  # General, Update, Evidence, Contact
     content = db.Column(db.Text, nullable=False)
     is_important = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
 
     # Relationships
     author = db.relationship("User", backref="case_notes")
@@ -223,7 +466,11 @@ class SystemLog(db.Model):
     )  # case_created, video_uploaded, sighting_found, etc.
     details = db.Column(db.Text)
     ip_address = db.Column(db.String(45))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index("ix_system_log_case_timestamp", "case_id", "timestamp", "id"),
+    )
 
     def __repr__(self):
         safe_action = sanitize_input(self.action) if self.action else 'Unknown'
@@ -237,7 +484,7 @@ class AdminMessage(db.Model):
     subject = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     sender = db.relationship("User", foreign_keys=[sender_id])
     recipient = db.relationship("User", foreign_keys=[recipient_id])
@@ -290,8 +537,8 @@ class BlogPost(db.Model):
     excerpt = db.Column(db.Text)
     is_published = db.Column(db.Boolean, default=False)
     author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now(), onupdate=db.func.now())
     
     author = db.relationship("User", backref="blog_posts")
 
@@ -304,7 +551,7 @@ class FAQ(db.Model):
     order = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
     created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     author = db.relationship("User", backref="faqs")
 
@@ -315,7 +562,7 @@ class AISettings(db.Model):
     setting_value = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     updated_by = db.Column(db.Integer, db.ForeignKey("user.id"))
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now(), onupdate=db.func.now())
     
     updater = db.relationship("User", backref="ai_settings_updates")
 
@@ -328,7 +575,7 @@ class ContactMessage(db.Model):
     subject = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     def __repr__(self):
         safe_name = sanitize_input(self.name) if self.name else 'Unknown'
@@ -340,8 +587,8 @@ class ChatRoom(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     admin_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_message_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
+    last_message_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
@@ -354,11 +601,17 @@ class ChatRoom(db.Model):
     
     @property
     def unread_count_for_user(self):
-        return ChatMessage.query.filter_by(chat_room_id=self.id, is_read=False).filter(ChatMessage.sender_id != self.user_id).count()
+        return _cached_unread_count(
+            ("chat_room", self.id, "user"),
+            ChatMessage.query.filter_by(chat_room_id=self.id, is_read=False).filter(ChatMessage.sender_id != self.user_id)
+        )
     
     @property
     def unread_count_for_admin(self):
-        return ChatMessage.query.filter_by(chat_room_id=self.id, is_read=False).filter(ChatMessage.sender_id != self.admin_id).count()
+        return _cached_unread_count(
+            ("chat_room", self.id, "admin"),
+            ChatMessage.query.filter_by(chat_room_id=self.id, is_read=False).filter(ChatMessage.sender_id != self.admin_id)
+        )
 
 
 class ChatMessage(db.Model):
@@ -371,33 +624,67 @@ class ChatMessage(db.Model):
     file_path = db.Column(db.String(500))  # For media files
     file_name = db.Column(db.String(200))  # Original filename
     is_read = db.Column(db.Boolean, default=False)
-    status = db.Column(db.String(20), default="sent")  # sent, delivered, seen
+    status = db.Column(db.Enum(*MESSAGE_STATUSES, name="message_status", length=20), default="sent")
     delivered_at = db.Column(db.DateTime)
     seen_at = db.Column(db.DateTime)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     hidden_for_user = db.Column(db.Boolean, default=False)  # Hidden for regular user
     hidden_for_admin = db.Column(db.Boolean, default=False)  # Hidden for admin
     
     # Relationships
     sender = db.relationship("User", backref="sent_chat_messages")
     
+    __table_args__ = (
+        db.Index("ix_chatmsg_room_unread", "chat_room_id", "is_read", "sender_id"),
+        # get_messages() polls with "id > since" inside one room
+        db.Index("ix_chatmsg_room_id", "chat_room_id", "id"),
+    )
+    
     def __repr__(self):
         return f"<ChatMessage {self.id} from User {self.sender_id}>"
     
     def mark_delivered(self):
-        """Mark message as delivered"""
+        """Mark message as delivered; the caller commits"""
         if self.status == 'sent':
             self.status = 'delivered'
             self.delivered_at = get_ist_now()
-            db.session.commit()
     
     def mark_seen(self):
-        """Mark message as seen"""
+        """Mark message as seen; the caller commits"""
         if self.status in ['sent', 'delivered']:
             self.status = 'seen'
             self.seen_at = get_ist_now()
             self.is_read = True
-            db.session.commit()
+    
+    @classmethod
+    def bulk_mark_seen(cls, room_id, viewer_id):
+        """Mark every unread message the viewer received in a room as seen
+        with a single UPDATE; returns the number of messages marked"""
+        result = db.session.execute(
+            db.update(cls)
+            .where(
+                cls.chat_room_id == room_id,
+                cls.sender_id != viewer_id,
+                cls.is_read == False,
+                cls.status.in_(['sent', 'delivered']),
+            )
+            .values(status='seen', is_read=True, seen_at=get_ist_now())
+        )
+        # Bulk UPDATEs skip the mapper events that normally do this
+        if result.rowcount:
+            invalidate_unread_counts(chat_room_id=room_id)
+        return result.rowcount
+
+    @classmethod
+    def bulk_hide(cls, room_id, for_admin):
+        """Hide every message in a room from one side of the chat with a
+        single UPDATE; unread counts ignore these flags, so no cache is
+        touched. Returns the number of messages hidden"""
+        column = "hidden_for_admin" if for_admin else "hidden_for_user"
+        result = db.session.execute(
+            db.update(cls).where(cls.chat_room_id == room_id).values({column: True})
+        )
+        return result.rowcount
 
 
 class Notification(db.Model):
@@ -416,10 +703,37 @@ class Notification(db.Model):
     recipient = db.relationship("User", foreign_keys=[user_id])
     sender = db.relationship("User", foreign_keys=[sender_id])
     
+    # The notifications page pages through a user's rows newest id first
+    __table_args__ = (
+        db.Index("ix_notification_user_id", "user_id", "id"),
+        # Partial: the unread badge count only ever scans unread rows
+        db.Index(
+            "ix_notif_user_unread",
+            "user_id",
+            "is_read",
+            postgresql_where=db.text("is_read = false"),
+            sqlite_where=db.text("is_read = 0"),
+        ),
+    )
+    
     def __repr__(self):
         safe_title = sanitize_input(self.title) if self.title else 'Unknown'
         return f"<Notification {safe_title} for User {self.user_id}>"
     
+    @classmethod
+    def bulk_create(cls, rows):
+        """Insert many notifications (dicts of column values) in a single
+        batched INSERT; the caller commits"""
+        if not rows:
+            return
+        now = get_ist_now()
+        for row in rows:
+            row.setdefault("created_at", now)
+        db.session.bulk_insert_mappings(cls, rows)
+        # Bulk inserts skip the mapper events that normally do this
+        for user_id in {row["user_id"] for row in rows}:
+            invalidate_unread_counts(user_id=user_id)
+    
     @property
     def ist_created_at(self):
         """Get created_at in IST timezone for display"""
@@ -429,6 +743,53 @@ class Notification(db.Model):
         return utc_to_ist(self.created_at)
 
 
+@db.event.listens_for(Notification, "after_insert")
+@db.event.listens_for(Notification, "after_update")
+@db.event.listens_for(Notification, "after_delete")
+def _notification_changed(mapper, connection, target):
+    invalidate_unread_counts(user_id=target.user_id)
+
+
+@db.event.listens_for(ChatMessage, "after_insert")
+@db.event.listens_for(ChatMessage, "after_update")
+@db.event.listens_for(ChatMessage, "after_delete")
+def _chat_message_changed(mapper, connection, target):
+    invalidate_unread_counts(chat_room_id=target.chat_room_id)
+
+
+# ChatRoom.last_message_at is not written per message; new messages are
+# noted on the session and every touched room is updated by one statement
+# just before the transaction commits
+_ROOMS_TOUCHED = "chat_rooms_touched"
+
+@db.event.listens_for(ChatMessage, "after_insert")
+def _chat_message_inserted(mapper, connection, target):
+    # Read the raw value; a server-side default isn't loaded during the flush
+    sent_at = db.inspect(target).dict.get("created_at")
+    if not isinstance(sent_at, datetime):
+        sent_at = get_ist_now()
+    # Messages flush in the order they were added, so the last one wins
+    touched = db.object_session(target).info.setdefault(_ROOMS_TOUCHED, {})
+    touched[target.chat_room_id] = sent_at
+
+@db.event.listens_for(db.session, "before_commit")
+def _update_chat_room_activity(session):
+    session.flush()
+    touched = session.info.pop(_ROOMS_TOUCHED, None)
+    if not touched:
+        return
+    room_table = ChatRoom.__table__
+    session.execute(
+        db.update(room_table)
+        .where(room_table.c.id.in_(touched))
+        .values(last_message_at=db.case(touched, value=room_table.c.id))
+    )
+
+@db.event.listens_for(db.session, "after_rollback")
+def _discard_chat_room_activity(session):
+    session.info.pop(_ROOMS_TOUCHED, None)
+
+
 class SurveillanceFootage(db.Model):
     """Admin uploaded surveillance footage for location-based searches"""
     id = db.Column(db.Integer, primary_key=True)
@@ -450,8 +811,8 @@ class SurveillanceFootage(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     is_processed = db.Column(db.Boolean, default=False)
     uploaded_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now(), onupdate=db.func.now())
     
     # Relationships
     uploader = db.relationship("User", backref="surveillance_footage")
@@ -465,25 +826,13 @@ class SurveillanceFootage(db.Model):
     def formatted_duration(self):
         if not self.duration:
             return "Unknown"
-        hours = int(self.duration // 3600)
-        minutes = int((self.duration % 3600) // 60)
-        seconds = int(self.duration % 60)
-        if hours > 0:
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        return f"{minutes:02d}:{seconds:02d}"
+        return _fmt_hhmmss(int(self.duration))
     
     @property
     def formatted_file_size(self):
         if not self.file_size:
             return "Unknown"
-        if self.file_size < 1024:
-            return f"{self.file_size} B"
-        elif self.file_size < 1024 * 1024:
-            return f"{self.file_size / 1024:.1f} KB"
-        elif self.file_size < 1024 * 1024 * 1024:
-            return f"{self.file_size / (1024 * 1024):.1f} MB"
-        else:
-            return f"{self.file_size / (1024 * 1024 * 1024):.1f} GB"
+        return _fmt_file_size(int(self.file_size))
 
 
 class LocationMatch(db.Model):
@@ -491,21 +840,23 @@ class LocationMatch(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     case_id = db.Column(db.Integer, db.ForeignKey("case.id"), nullable=False)
     footage_id = db.Column(db.Integer, db.ForeignKey("surveillance_footage.id"), nullable=False)
-    match_score = db.Column(db.Float, nullable=False)  # 0.0 to 1.0
+    match_score = db.Column(QuantizedScore, nullable=False)  # 0.0 to 1.0
     distance_km = db.Column(db.Float)  # Distance between locations in km
     match_type = db.Column(db.String(20), default="location")  # location, proximity, exact
-    status = db.Column(db.String(20), default="pending")  # pending, processing, completed, failed
+    status = db.Column(db.Enum(*MATCH_STATUSES, name="match_status", length=20), default="pending")
     ai_analysis_started = db.Column(db.DateTime)
     ai_analysis_completed = db.Column(db.DateTime)
     person_found = db.Column(db.Boolean, default=False)
     confidence_score = db.Column(db.Float)  # AI confidence if person found
     detection_count = db.Column(db.Integer, default=0)  # Number of detections
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     # Relationships
     case = db.relationship("Case", back_populates="location_matches")
     detections = db.relationship("PersonDetection", backref="location_match", lazy=True, cascade="all, delete-orphan")
     
+    __table_args__ = (db.Index("ix_locmatch_case_score", "case_id", "match_score"),)
+    
     def __repr__(self):
         return f"<LocationMatch Case {self.case_id} - Footage {self.footage_id} ({self.match_score:.2f})>"
 
@@ -515,26 +866,30 @@ class PersonDetection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     location_match_id = db.Column(db.Integer, db.ForeignKey("location_match.id"), nullable=False)
     timestamp = db.Column(db.Float, nullable=False)  # Video timestamp in seconds
-    confidence_score = db.Column(db.Float, nullable=False)  # AI confidence 0.0-1.0
-    face_match_score = db.Column(db.Float)  # Face recognition score
-    clothing_match_score = db.Column(db.Float)  # Clothing analysis score
-    body_pose_score = db.Column(db.Float)  # Body pose similarity
-    detection_box = db.Column(db.Text)  # JSON bounding box coordinates
+    confidence_score = db.Column(QuantizedScore, nullable=False)  # AI confidence 0.0-1.0
+    face_match_score = db.Column(QuantizedScore)  # Face recognition score
+    clothing_match_score = db.Column(QuantizedScore)  # Clothing analysis score
+    body_pose_score = db.Column(QuantizedScore)  # Body pose similarity
+    detection_box = db.Column(JSONDocument)  # bounding box coordinates
     frame_path = db.Column(db.String(500))  # Extracted frame image path
     analysis_method = db.Column(db.String(50))  # face_recognition, clothing_analysis, multi_modal
     verified = db.Column(db.Boolean, default=False)
     verified_by = db.Column(db.Integer, db.ForeignKey("user.id"))
     notes = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     # Relationships
     verifier = db.relationship("User", backref="verified_detections")
     
+    __table_args__ = (
+        db.Index(
+            "ix_detbox_gin", "detection_box", postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     def __repr__(self):
         return f"<PersonDetection Match {self.location_match_id} at {self.timestamp}s ({self.confidence_score:.2f})>"
     
     @property
     def formatted_timestamp(self):
-        minutes = int(self.timestamp // 60)
-        seconds = int(self.timestamp % 60)
-        return f"{minutes:02d}:{seconds:02d}"
+        return _fmt_mmss(int(self.timestamp))
@@ -0,0 +1,288 @@
+"""
+Online presence tracking backed by Redis
+
+Every authenticated request refreshes a short-lived ``online:<user_id>`` key
+instead of updating the user row. Last-seen times collect in a Redis hash
+and are written back to the database in one batch by ``tasks.flush_presence``.
+Callers fall back to the database columns when Redis is unavailable, and
+those writes are throttled per user; see ``fallback_write_due``.
+
+The navbar's unread chat badge and the per-user status JSON polled by
+every online dot are cached here too, so every poll from
+every client doesn't run a join and COUNT; see ``get_chat_unread``.
+
+New chat messages are announced on a per-room pub/sub channel, which the
+chat page listens to over server-sent events instead of polling.
+"""
+import threading
+import time
+from datetime import datetime
+
+import redis
+from cachetools import TTLCache
+from flask import current_app
+
+from app.models import get_ist_now
+
+ONLINE_TTL = 120  # seconds without a request before a user shows offline
+USER_STATUS_TTL = 30  # seconds a cached status response may lag a user's activity
+CHAT_UNREAD_TTL = 300  # upper bound on how stale a missed invalidation can leave a badge
+CHAT_STREAM_LIFETIME = 55  # seconds before an event stream ends and the browser reconnects
+CHAT_STREAM_HEARTBEAT = 15  # seconds between keep-alives on an idle stream
+LAST_SEEN_KEY = "presence:last_seen"
+RETRY_AFTER = 30  # seconds to stop trying Redis after a failure
+FALLBACK_WRITE_INTERVAL = 60  # seconds between user row writes per user while Redis is down
+
+_client = None
+_down_until = 0.0
+_fallback_writes = TTLCache(maxsize=4096, ttl=FALLBACK_WRITE_INTERVAL)
+_fallback_writes_lock = threading.Lock()
+
+
+def _online_key(user_id):
+    return f"online:{user_id}"
+
+
+def _user_status_key(user_id):
+    return f"status:{user_id}"
+
+
+def _chat_unread_key(user_id):
+    return f"chat:unread:{user_id}"
+
+
+def _chat_channel(room_id):
+    return f"chat:{room_id}"
+
+
+def _get_client():
+    """Return the shared Redis client, or None while Redis is known to be down"""
+    global _client
+    if time.monotonic() < _down_until:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(
+            current_app.config["REDIS_URL"],
+            socket_connect_timeout=1,
+            socket_timeout=1,
+            decode_responses=True,
+        )
+    return _client
+
+
+def _mark_down():
+    """Skip Redis for a while so an outage doesn't add a timeout to every request"""
+    global _down_until
+    _down_until = time.monotonic() + RETRY_AFTER
+
+
+def touch(user_id):
+    """Record activity for a user; returns False if Redis could not be reached"""
+    client = _get_client()
+    if client is None:
+        return False
+    now = get_ist_now().isoformat()
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.setex(_online_key(user_id), ONLINE_TTL, now)
+        pipe.hset(LAST_SEEN_KEY, user_id, now)
+        pipe.execute()
+    except redis.RedisError:
+        _mark_down()
+        return False
+    return True
+
+
+def fallback_write_due(user_id):
+    """
+    Whether to write activity to the user row while Redis is down; True at
+    most once per FALLBACK_WRITE_INTERVAL for each user in this process
+    """
+    with _fallback_writes_lock:
+        if user_id in _fallback_writes:
+            return False
+        _fallback_writes[user_id] = True
+    return True
+
+
+def clear(user_id):
+    """
+    Mark a user offline immediately, e.g. on logout. The caller writes the
+    user row, so any pending last-seen time is dropped rather than flushed
+    """
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(_online_key(user_id), _user_status_key(user_id))
+        pipe.hdel(LAST_SEEN_KEY, user_id)
+        pipe.execute()
+    except redis.RedisError:
+        _mark_down()
+
+
+def get_presence(user_id):
+    """
+    Return (is_online, last_seen) from Redis, or None if Redis has nothing
+    for this user or could not be reached
+    """
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.get(_online_key(user_id))
+        pipe.hget(LAST_SEEN_KEY, user_id)
+        online_since, last_seen = pipe.execute()
+    except redis.RedisError:
+        _mark_down()
+        return None
+    # The online key holds the latest activity time and outlives a flush
+    if online_since is not None:
+        return True, datetime.fromisoformat(online_since)
+    if last_seen is not None:
+        return False, datetime.fromisoformat(last_seen)
+    return None
+
+
+def get_presence_many(user_ids):
+    """
+    Batch form of get_presence: {user_id: (is_online, last_seen)} for the
+    users Redis has data for, in one round trip
+    """
+    client = _get_client()
+    if client is None or not user_ids:
+        return {}
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.get(_online_key(user_id))
+            pipe.hget(LAST_SEEN_KEY, user_id)
+        values = pipe.execute()
+    except redis.RedisError:
+        _mark_down()
+        return {}
+    found = {}
+    for user_id, online_since, last_seen in zip(user_ids, values[::2], values[1::2]):
+        if online_since is not None:
+            found[user_id] = True, datetime.fromisoformat(online_since)
+        elif last_seen is not None:
+            found[user_id] = False, datetime.fromisoformat(last_seen)
+    return found
+
+
+def drain_last_seen():
+    """Atomically take all pending last-seen times as {user_id: datetime}"""
+    client = _get_client()
+    if client is None:
+        return {}
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.hgetall(LAST_SEEN_KEY)
+        pipe.delete(LAST_SEEN_KEY)
+        pending, _ = pipe.execute()
+    except redis.RedisError:
+        _mark_down()
+        return {}
+    return {int(user_id): datetime.fromisoformat(ts) for user_id, ts in pending.items()}
+
+
+def get_user_status(user_id):
+    """Cached status response JSON for a user, or None on a miss or without Redis"""
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        return client.get(_user_status_key(user_id))
+    except redis.RedisError:
+        _mark_down()
+        return None
+
+
+def set_user_status(user_id, data):
+    """Cache a user's status response JSON for USER_STATUS_TTL seconds"""
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.set(_user_status_key(user_id), data, ex=USER_STATUS_TTL)
+    except redis.RedisError:
+        _mark_down()
+
+
+def get_chat_unread(user_id):
+    """Cached unread chat message count, or None on a miss or without Redis"""
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        count = client.get(_chat_unread_key(user_id))
+    except redis.RedisError:
+        _mark_down()
+        return None
+    return None if count is None else int(count)
+
+
+def set_chat_unread(user_id, count):
+    """Cache an unread chat count computed from the database"""
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.set(_chat_unread_key(user_id), count, ex=CHAT_UNREAD_TTL)
+    except redis.RedisError:
+        _mark_down()
+
+
+def clear_chat_unread(*user_ids):
+    """Drop cached unread chat counts after messages are sent or seen"""
+    client = _get_client()
+    if client is None or not user_ids:
+        return
+    try:
+        client.delete(*(_chat_unread_key(user_id) for user_id in user_ids))
+    except redis.RedisError:
+        _mark_down()
+
+
+def publish_chat(room_id, data):
+    """Announce a chat room event to anyone subscribed to the room"""
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.publish(_chat_channel(room_id), data)
+    except redis.RedisError:
+        _mark_down()
+
+
+def subscribe_chat(room_id):
+    """Subscribe to a chat room's events; returns a PubSub, or None without Redis"""
+    client = _get_client()
+    if client is None:
+        return None
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        pubsub.subscribe(_chat_channel(room_id))
+    except redis.RedisError:
+        _mark_down()
+        pubsub.close()
+        return None
+    return pubsub
+
+
+def iter_chat_events(pubsub):
+    """
+    Yield each published event's data, or None when a heartbeat is due,
+    until the stream's lifetime runs out; closes the subscription
+    """
+    deadline = time.monotonic() + CHAT_STREAM_LIFETIME
+    try:
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=CHAT_STREAM_HEARTBEAT)
+            yield message["data"] if message else None
+    except redis.RedisError:
+        _mark_down()
+    finally:
+        pubsub.close()
@@ -1,6 +1,5 @@
 import os
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime, time, timedelta
 from flask import (
     Blueprint,
     render_template,
@@ -10,26 +9,41 @@ from flask import (
     flash,
     jsonify,
     abort,
+    Response,
+    current_app,
+    stream_with_context,
 )
+import orjson
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
-from functools import wraps
-
-# IST timezone
-IST = pytz.timezone('Asia/Kolkata')
-
-def get_ist_now():
-    """Get current time in IST"""
-    return datetime.now(IST)
-
-def utc_to_ist(utc_dt):
-    """Convert UTC datetime to IST"""
-    if utc_dt.tzinfo is None:
-        utc_dt = pytz.utc.localize(utc_dt)
-    return utc_dt.astimezone(IST)
-
-from app import db
-from app.models import User, Case, TargetImage, SearchVideo, Sighting, Announcement, AnnouncementRead
+from functools import lru_cache, wraps
+from sqlalchemy.orm import contains_eager, joinedload, load_only, selectinload
+
+from app import db, presence
+from app.models import (
+    User,
+    Case,
+    TargetImage,
+    SearchVideo,
+    Sighting,
+    Announcement,
+    AnnouncementRead,
+    ContactMessage,
+    ChatRoom,
+    ChatMessage,
+    Notification,
+    LocationMatch,
+    PersonDetection,
+    invalidate_unread_counts,
+)
+from app.models import get_ist_now, utc_to_ist
+from app.utils import (
+    UPLOAD_BUFFER_SIZE,
+    create_safe_filename,
+    keyset_paginate,
+    sanitize_filename,
+    sniff_upload_type,
+)
 from app.forms import (
     RegistrationForm,
     LoginForm,
@@ -41,24 +55,90 @@ from app.forms import (
 
 
 # File validation helper functions
+ALLOWED_IMAGE_EXTENSIONS = frozenset({"png", "jpg", "jpeg", "gif", "bmp", "webp"})
+ALLOWED_VIDEO_EXTENSIONS = frozenset({"mp4", "avi", "mov", "mkv", "wmv", "flv", "webm"})
+
+
 def _is_allowed_image_file(filename):
     """Check if uploaded file is an allowed image type"""
-    ALLOWED_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "bmp", "webp"}
-    return (
-        "." in filename
-        and filename.rsplit(".", 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
-    )
+    _, dot, ext = filename.rpartition(".")
+    return bool(dot) and ext.lower() in ALLOWED_IMAGE_EXTENSIONS
 
 
 def _is_allowed_video_file(filename):
     """Check if uploaded file is an allowed video type"""
-    ALLOWED_VIDEO_EXTENSIONS = {"mp4", "avi", "mov", "mkv", "wmv", "flv", "webm"}
+    _, dot, ext = filename.rpartition(".")
+    return bool(dot) and ext.lower() in ALLOWED_VIDEO_EXTENSIONS
+
+
+def _upload_size(file_storage):
+    """
+    Size of an uploaded file in bytes: the end offset of the spooled
+    upload, which is a seek rather than a read. The part's Content-Length
+    header is client-supplied, so it is never trusted for size limits
+    """
+    stream = file_storage.stream
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+
+@lru_cache(maxsize=4096)
+def _ist_time(dt):
+    """Format a stored timestamp as an IST clock time; chat polls repeat the
+    same timestamps, so the conversions are memoized"""
+    return utc_to_ist(dt).strftime('%I:%M %p IST')
+
+
+# Most messages get_messages() returns per call
+CHAT_PAGE_SIZE = 200
+
+# Most users get_users_status() reports on per call
+STATUS_BATCH_SIZE = 200
+
+
+def _chat_message_payload(msg):
+    """JSON-ready fields of a chat message, as the chat page renders them"""
+    return {
+        'id': msg.id,
+        'sender_id': msg.sender_id,
+        'sender_name': msg.sender.username,
+        'content': msg.content,
+        'message_type': msg.message_type,
+        'file_path': msg.file_path,
+        'file_name': msg.file_name,
+        'created_at': msg.created_at.isoformat(),
+        'created_at_ist': _ist_time(msg.created_at),
+        'status': msg.status,
+        'delivered_at': _ist_time(msg.delivered_at) if msg.delivered_at else None,
+        'seen_at': _ist_time(msg.seen_at) if msg.seen_at else None
+    }
+
+
+def _chat_page_statement(hidden_column):
+    """One page of a room's messages after a given id, minus those the
+    viewer cleared; room_id and since are bound at execution"""
     return (
-        "." in filename
-        and filename.rsplit(".", 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
+        db.select(ChatMessage)
+        .where(
+            ChatMessage.chat_room_id == db.bindparam('room_id'),
+            ChatMessage.id > db.bindparam('since'),
+            (hidden_column == False) | (hidden_column == None),
+        )
+        .options(selectinload(ChatMessage.sender))
+        .order_by(ChatMessage.id.asc())
+        .limit(CHAT_PAGE_SIZE + 1)
     )
 
 
+# get_messages() runs on every chat poll, so its statements are built once,
+# keyed on whether the viewer is the room's admin
+_CHAT_PAGE_STATEMENTS = {
+    True: _chat_page_statement(ChatMessage.hidden_for_admin),
+    False: _chat_page_statement(ChatMessage.hidden_for_user),
+}
+
+
 # Authorization helper functions
 def admin_required(f):
     @wraps(f)
@@ -75,7 +155,10 @@ def case_owner_required(f):
     def decorated_function(*args, **kwargs):
         case_id = kwargs.get("case_id")
         if case_id:
-            case = Case.query.get_or_404(case_id)
+            # Load the whole row, not just user_id: the view's own
+            # get_or_404(case_id) is then answered from the session's
+            # identity map instead of a second SELECT
+            case = db.get_or_404(Case, case_id)
             if case.user_id != current_user.id and not current_user.is_admin:
                 abort(403)
         return f(*args, **kwargs)
@@ -110,16 +193,22 @@ def dashboard():
         return redirect(url_for("admin.dashboard"))
 
     # Regular user dashboard
-    user_cases = Case.query.filter_by(user_id=current_user.id).all()
-    total_cases = len(user_cases)
-    active_cases = len([c for c in user_cases if c.status in ["Approved", "Queued", "Processing", "Active"]])
-    pending_approval = len([c for c in user_cases if c.status == "Pending Approval"])
-    completed_cases = len([c for c in user_cases if c.status == "Completed"])
-    total_sightings = sum(len(c.sightings) for c in user_cases)
+    # Counts per status and the sighting total in one aggregate
+    def count_where(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    total_cases, active_cases, pending_approval, completed_cases, total_sightings = db.session.query(
+        db.func.count(Case.id),
+        count_where(Case.status.in_(["Approved", "Queued", "Processing", "Active"])),
+        count_where(Case.status == "Pending Approval"),
+        count_where(Case.status == "Completed"),
+        db.func.coalesce(db.func.sum(Case.sightings_count), 0),
+    ).filter(Case.user_id == current_user.id).one()
 
     # Get recent cases (last 5)
     recent_cases = (
         Case.query.filter_by(user_id=current_user.id)
+        .options(selectinload(Case.target_images), selectinload(Case.location_matches))
         .order_by(Case.created_at.desc())
         .limit(5)
         .all()
@@ -135,10 +224,11 @@ def dashboard():
     
     # Get recent unread announcements for user dashboard
     try:
-        all_active = Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).all()
-        read_announcement_ids = db.session.query(AnnouncementRead.announcement_id).filter_by(user_id=current_user.id).all()
-        read_ids = [r[0] for r in read_announcement_ids]
-        recent_announcements = [a for a in all_active if a.id not in read_ids][:3]
+        # NOT EXISTS against the user's read receipts, so only 3 rows come back
+        recent_announcements = Announcement.query.filter(
+            Announcement.is_active == True,
+            ~Announcement.read_by.any(AnnouncementRead.user_id == current_user.id)
+        ).order_by(Announcement.created_at.desc()).limit(3).all()
     except Exception:
         # If table doesn't exist, show all announcements
         recent_announcements = Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).limit(3).all()
@@ -161,7 +251,6 @@ def register_case():
     form = NewCaseForm()
     if request.method == 'POST' and form.validate_on_submit():
         # Check for recent duplicate submissions (within last 5 minutes)
-        from datetime import datetime, timedelta
         recent_time = datetime.utcnow() - timedelta(minutes=5)
         existing_case = Case.query.filter(
             Case.user_id == current_user.id,
@@ -180,10 +269,9 @@ def register_case():
         parsed_time = None
         if last_seen_time:
             try:
-                from datetime import time
-                hour, minute = map(int, last_seen_time.split(':'))
-                parsed_time = time(hour, minute)
-            except:
+                # <input type="time"> sends HH:MM, or HH:MM:SS with a step
+                parsed_time = time.fromisoformat(last_seen_time)
+            except ValueError:
                 parsed_time = None
         
         # Create new case with comprehensive data  
@@ -210,8 +298,13 @@ def register_case():
         db.session.add(new_case)
         db.session.commit()
 
+        # Ensure uploads directory exists
+        upload_dir = os.path.join("app", "static", "uploads")
+        os.makedirs(upload_dir, exist_ok=True)
+
         # Handle multiple photo uploads with enhanced security
         photo_files = form.photos.data
+        new_images = []
         for photo_file in photo_files:
             if photo_file and photo_file.filename != "":
                 # Validate file type
@@ -220,13 +313,7 @@ def register_case():
                     continue
 
                 # Create secure unique filename
-                try:
-                    from app.utils import sanitize_filename, create_safe_filename
-                    original_filename = sanitize_filename(photo_file.filename)
-                except ImportError:
-                    # Fallback if utils module doesn't exist
-                    original_filename = secure_filename(photo_file.filename)
-                
+                original_filename = sanitize_filename(photo_file.filename)
                 if not original_filename:
                     flash("Invalid filename", "error")
                     continue
@@ -238,46 +325,25 @@ def register_case():
                     else "jpg"
                 )
                 
-                try:
-                    unique_filename = create_safe_filename(f"case_{new_case.id}_photo", file_ext)
-                except (ImportError, NameError):
-                    # Fallback filename generation
-                    import uuid
-                    unique_filename = f"case_{new_case.id}_photo_{uuid.uuid4().hex[:8]}.{file_ext}"
-
-                # Ensure uploads directory exists
-                upload_dir = os.path.join("app", "static", "uploads")
-                os.makedirs(upload_dir, exist_ok=True)
-
+                unique_filename = create_safe_filename(f"case_{new_case.id}_photo", file_ext)
                 save_path = os.path.join(upload_dir, unique_filename)
 
                 # Validate file size (already handled by Flask config, but double-check)
-                photo_file.seek(0, 2)  # Seek to end
-                file_size = photo_file.tell()
-                photo_file.seek(0)  # Reset to beginning
-
-                if file_size > 16 * 1024 * 1024:  # 16MB limit
+                if _upload_size(photo_file) > 16 * 1024 * 1024:  # 16MB limit
                     flash(f"File too large: {original_filename}", "error")
                     continue
 
-                photo_file.save(save_path)
-
-                # Validate file content after upload (optional)
-                try:
-                    from app.utils import validate_file_content
-                    if not validate_file_content(save_path, "image"):
-                        os.remove(save_path)  # Remove invalid file
-                        flash(f"Invalid image file content: {original_filename}", "error")
-                        continue
-                except ImportError:
-                    # Skip validation if utils module doesn't exist
-                    pass
-
-                db_path = os.path.join("static", "uploads", unique_filename).replace(
-                    "\\", "/"
-                )
-                target_image = TargetImage(case_id=new_case.id, image_path=db_path)
-                db.session.add(target_image)
+                # Validate file content from its header before writing anything
+                if not sniff_upload_type(photo_file, "image"):
+                    flash(f"Invalid image file content: {original_filename}", "error")
+                    continue
+
+                photo_file.save(save_path, buffer_size=UPLOAD_BUFFER_SIZE)
+
+                db_path = f"static/uploads/{unique_filename}"
+                new_images.append(TargetImage(case_id=new_case.id, image_path=db_path))
+
+        db.session.add_all(new_images)
 
         # Handle optional video upload with enhanced security
         video_file = form.video.data
@@ -287,12 +353,7 @@ def register_case():
                 flash(f"Invalid video file type: {video_file.filename}", "error")
             else:
                 # Create secure unique filename
-                try:
-                    from app.utils import sanitize_filename, create_safe_filename
-                    original_filename = sanitize_filename(video_file.filename)
-                except ImportError:
-                    original_filename = secure_filename(video_file.filename)
-                
+                original_filename = sanitize_filename(video_file.filename)
                 if not original_filename:
                     flash("Invalid video filename", "error")
                 else:
@@ -303,46 +364,24 @@ def register_case():
                         else "mp4"
                     )
                     
-                    try:
-                        unique_filename = create_safe_filename(f"case_{new_case.id}_video", file_ext)
-                    except (ImportError, NameError):
-                        import uuid
-                        unique_filename = f"case_{new_case.id}_video_{uuid.uuid4().hex[:8]}.{file_ext}"
-
-                    upload_dir = os.path.join("app", "static", "uploads")
-                    os.makedirs(upload_dir, exist_ok=True)
-
+                    unique_filename = create_safe_filename(f"case_{new_case.id}_video", file_ext)
                     save_path = os.path.join(upload_dir, unique_filename)
 
                     # Validate file size
-                    video_file.seek(0, 2)
-                    file_size = video_file.tell()
-                    video_file.seek(0)
-
-                    if file_size > 100 * 1024 * 1024:  # 100MB limit for videos
+                    if _upload_size(video_file) > 100 * 1024 * 1024:  # 100MB limit for videos
                         flash(f"Video file too large: {original_filename}", "error")
+                    elif not sniff_upload_type(video_file, "video"):
+                        flash(f"Invalid video file content: {original_filename}", "error")
                     else:
-                        video_file.save(save_path)
-
-                        # Validate file content after upload (optional)
-                        try:
-                            from app.utils import validate_file_content
-                            if not validate_file_content(save_path, "video"):
-                                os.remove(save_path)  # Remove invalid file
-                                flash(f"Invalid video file content: {original_filename}", "error")
-                        except ImportError:
-                            # Skip validation if utils module doesn't exist
-                            pass
-                        else:
-                            db_path = os.path.join(
-                                "static", "uploads", unique_filename
-                            ).replace("\\", "/")
-                            search_video = SearchVideo(
-                                case_id=new_case.id,
-                                video_path=db_path,
-                                video_name=original_filename,
-                            )
-                            db.session.add(search_video)
+                        video_file.save(save_path, buffer_size=UPLOAD_BUFFER_SIZE)
+
+                        db_path = f"static/uploads/{unique_filename}"
+                        search_video = SearchVideo(
+                            case_id=new_case.id,
+                            video_path=db_path,
+                            video_name=original_filename,
+                        )
+                        db.session.add(search_video)
 
         try:
             db.session.commit()
@@ -352,20 +391,20 @@ def register_case():
                 flash("Warning: No valid photos were uploaded. Please add photos for better AI analysis.", "warning")
             
             # Create admin notification for new case
-            from app.models import Notification, User
-            admins = User.query.filter_by(is_admin=True).all()
+            admin_ids = db.session.scalars(db.select(User.id).filter_by(is_admin=True)).all()
             
-            for admin in admins:
-                notification = Notification(
-                    user_id=admin.id,
-                    sender_id=current_user.id,
-                    title=f"🔍 New Case Pending Approval: {new_case.person_name}",
-                    message=f"Location: {new_case.last_seen_location}\nAge: {new_case.age or 'Unknown'}\nRegistered by: {current_user.username}\n\nPlease review and approve this case.",
-                    type="approval",
-                    related_url=f"/admin/cases/{new_case.id}",
-                    created_at=get_ist_now()
-                )
-                db.session.add(notification)
+            Notification.bulk_create([
+                {
+                    "user_id": admin_id,
+                    "sender_id": current_user.id,
+                    "title": f"🔍 New Case Pending Approval: {new_case.person_name}",
+                    "message": f"Location: {new_case.last_seen_location}\nAge: {new_case.age or 'Unknown'}\nRegistered by: {current_user.username}\n\nPlease review and approve this case.",
+                    "type": "approval",
+                    "related_url": f"/admin/cases/{new_case.id}",
+                }
+                for admin_id in admin_ids
+            ])
+            db.session.commit()
             
             # Don't start AI processing - wait for admin approval
             success_msg = f"Missing person case for {new_case.person_name} has been submitted successfully! Your case is now pending admin approval. You will be notified once it's reviewed."
@@ -417,6 +456,7 @@ def login():
         user.is_online = True
         user.last_seen = ist_now
         db.session.commit()
+        presence.touch(user.id)
         
         login_user(user, remember=form.remember_me.data)
         return redirect(url_for("main.index"))
@@ -430,6 +470,7 @@ def logout():
     current_user.is_online = False
     current_user.last_seen = get_ist_now()
     db.session.commit()
+    presence.clear(current_user.id)
     logout_user()
     return redirect(url_for("main.index"))
 
@@ -471,7 +512,24 @@ def reset_password(token):
 @bp.route("/profile")
 @login_required
 def profile():
-    cases = Case.query.filter_by(user_id=current_user.id).order_by(Case.id.desc()).all()
+    # Only the columns the case cards show; details and the other long
+    # text fields stay in the database
+    cases = (
+        Case.query.filter_by(user_id=current_user.id)
+        .options(
+            load_only(
+                Case.id, Case.person_name, Case.status, Case.age,
+                Case.last_seen_location, Case.date_missing, Case.created_at,
+            ),
+            selectinload(Case.target_images).load_only(TargetImage.image_path),
+            selectinload(Case.search_videos).load_only(SearchVideo.id),
+            selectinload(Case.sightings).load_only(
+                Sighting.video_name, Sighting.timestamp, Sighting.confidence_score
+            ),
+        )
+        .order_by(Case.created_at.desc(), Case.id.desc())
+        .all()
+    )
     return render_template("profile.html", cases=cases)
 
 
@@ -484,19 +542,24 @@ def case_details(case_id):
         case = Case.query.get_or_404(case_id)
         
         # Get AI analysis results
-        from app.models import LocationMatch, PersonDetection
-        location_matches = LocationMatch.query.filter_by(case_id=case_id).all()
-        
-        # Get all detections for this case
-        all_detections = []
-        for match in location_matches:
-            detections = PersonDetection.query.filter_by(location_match_id=match.id).all()
-            for detection in detections:
-                detection.match = match  # Add match info to detection
-                all_detections.append(detection)
+        location_matches = (
+            LocationMatch.query.filter_by(case_id=case_id)
+            .options(joinedload(LocationMatch.footage))
+            .all()
+        )
         
-        # Sort detections by confidence score
-        all_detections.sort(key=lambda x: x.confidence_score, reverse=True)
+        # Get all detections for this case in one join, best first; the
+        # matches come from the identity map, already loaded above
+        all_detections = (
+            PersonDetection.query
+            .join(PersonDetection.location_match)
+            .filter(LocationMatch.case_id == case_id)
+            .options(contains_eager(PersonDetection.location_match))
+            .order_by(PersonDetection.confidence_score.desc())
+            .all()
+        )
+        for detection in all_detections:
+            detection.match = detection.location_match  # Add match info to detection
         
         return render_template(
             "case_details.html", 
@@ -516,24 +579,22 @@ def case_details(case_id):
 @case_owner_required
 def withdraw_case(case_id):
     """Completely delete a case and all associated data"""
-    case = Case.query.get_or_404(case_id)
+    # Load the uploads with the case; there are only a few of each, so one
+    # joined query beats a lazy load per collection
+    case = (
+        Case.query.options(joinedload(Case.target_images), joinedload(Case.search_videos))
+        .filter_by(id=case_id)
+        .first_or_404()
+    )
     person_name = case.person_name
     
     # Delete associated files from filesystem
-    for target_image in case.target_images:
-        try:
-            file_path = os.path.join("app", target_image.image_path)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except:
-            pass  # Continue even if file deletion fails
-    
-    for search_video in case.search_videos:
+    file_paths = [image.image_path for image in case.target_images]
+    file_paths += [video.video_path for video in case.search_videos]
+    for file_path in file_paths:
         try:
-            file_path = os.path.join("app", search_video.video_path)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except:
+            os.remove(os.path.join("app", file_path))
+        except OSError:
             pass  # Continue even if file deletion fails
     
     # Delete case from database (cascade will handle related records)
@@ -549,21 +610,30 @@ def withdraw_case(case_id):
 @case_owner_required
 def case_status(case_id):
     case = Case.query.get_or_404(case_id)
-    sightings = []
-    for s in case.sightings:
-        video_name = (
-            s.search_video.video_path.split("/")[-1] if s.search_video else "N/A"
-        )
-        sightings.append(
-            {
-                "video_name": video_name,
-                "timestamp": s.timestamp,
-                "confidence_score": round(s.confidence_score, 2),
-                "thumbnail_path": url_for(
-                    "static", filename=s.thumbnail_path.replace("static\\", "/")
-                ),
-            }
+    # Polled by the status page: one query for the sightings and their
+    # videos, and the static URL prefix resolved once rather than per row
+    rows = db.session.execute(
+        db.select(
+            Sighting.timestamp,
+            Sighting.confidence_score,
+            Sighting.thumbnail_path,
+            SearchVideo.video_path,
         )
+        .outerjoin(SearchVideo, Sighting.search_video_id == SearchVideo.id)
+        .where(Sighting.case_id == case_id)
+        .order_by(Sighting.id)
+    ).all()
+    static_prefix = url_for("static", filename="")
+    sightings = [
+        {
+            "video_name": video_path.split("/")[-1] if video_path else "N/A",
+            "timestamp": timestamp,
+            "confidence_score": round(confidence_score, 2),
+            "thumbnail_path": static_prefix + thumbnail_path.replace("static\\", "/")
+            if thumbnail_path else None,
+        }
+        for timestamp, confidence_score, thumbnail_path, video_path in rows
+    ]
     response_data = {"status": case.status, "sightings": sightings}
     return jsonify(response_data)
 
@@ -572,19 +642,31 @@ def case_status(case_id):
 @login_required
 def notifications():
     """User notifications page"""
-    from app.models import Notification
-
-    # Get all notifications for current user, ordered by newest first
-    user_notifications = (
-        Notification.query.filter_by(user_id=current_user.id)
-        .order_by(Notification.created_at.desc())
-        .all()
+    # Newest first, one page at a time; ?before=<id> seeks to older ones
+    before = request.args.get("before", type=int)
+    user_notifications, has_older = keyset_paginate(
+        Notification.query.filter_by(user_id=current_user.id).options(
+            joinedload(Notification.sender)
+        ),
+        Notification.id,
+        before,
+        per_page=50,
     )
 
+    # Totals for the whole inbox in one aggregate, not from the current page
+    total, from_admin = db.session.query(
+        db.func.count(Notification.id), db.func.count(Notification.sender_id)
+    ).filter(Notification.user_id == current_user.id).one()
+    stats = {"total": total, "from_admin": from_admin, "system": total - from_admin}
+
     # Don't automatically mark as read - let user choose
 
     return render_template(
-        "notifications.html", title="Notifications", notifications=user_notifications
+        "notifications.html",
+        title="Notifications",
+        notifications=user_notifications,
+        stats=stats,
+        older_cursor=user_notifications[-1].id if has_older else None,
     )
 
 
@@ -594,6 +676,7 @@ def missing_persons():
     """Public directory of missing persons cases"""
     cases = (
         Case.query.filter(Case.status.in_(["Queued", "Processing", "Completed"]))
+        .options(selectinload(Case.target_images))
         .order_by(Case.created_at.desc())
         .all()
     )
@@ -634,7 +717,6 @@ def contact():
         
         if name and email and subject and message:
             # Save message to database
-            from app.models import ContactMessage
             contact_message = ContactMessage(
                 name=name,
                 email=email,
@@ -668,8 +750,6 @@ def faq():
 @login_required
 def chat_list():
     """List all chat rooms for current user"""
-    from app.models import ChatRoom, User
-    
     if current_user.is_admin:
         # Admin sees all chat rooms where they are the admin
         chat_rooms = ChatRoom.query.filter_by(admin_id=current_user.id).order_by(ChatRoom.last_message_at.desc()).all()
@@ -679,9 +759,9 @@ def chat_list():
         
         # If no chat room exists, create one with first available admin
         if not chat_rooms:
-            admin = User.query.filter_by(is_admin=True).first()
-            if admin:
-                new_room = ChatRoom(user_id=current_user.id, admin_id=admin.id)
+            admin_id = User.default_admin_id()
+            if admin_id:
+                new_room = ChatRoom(user_id=current_user.id, admin_id=admin_id)
                 db.session.add(new_room)
                 db.session.commit()
                 chat_rooms = [new_room]
@@ -696,8 +776,6 @@ def chat_list():
 @login_required
 def chat_room(room_id):
     """Individual chat room"""
-    from app.models import ChatRoom, ChatMessage
-    
     room = ChatRoom.query.get_or_404(room_id)
     
     # Check access permissions
@@ -715,16 +793,16 @@ def chat_room(room_id):
         else:
             messages_query = messages_query.filter((ChatMessage.hidden_for_user == False) | (ChatMessage.hidden_for_user == None))
         
-        messages = messages_query.order_by(ChatMessage.created_at.asc()).all()
+        messages = messages_query.order_by(ChatMessage.id.asc()).all()
     except Exception as e:
         print(f"Error loading messages: {e}")
         # Fallback to all messages if column doesn't exist
-        messages = ChatMessage.query.filter_by(chat_room_id=room_id).order_by(ChatMessage.created_at.asc()).all()
+        messages = ChatMessage.query.filter_by(chat_room_id=room_id).order_by(ChatMessage.id.asc()).all()
     
     # Mark messages as seen (not just read)
-    unread_messages = ChatMessage.query.filter_by(chat_room_id=room_id, is_read=False).filter(ChatMessage.sender_id != current_user.id).all()
-    for msg in unread_messages:
-        msg.mark_seen()
+    if ChatMessage.bulk_mark_seen(room_id, current_user.id):
+        db.session.commit()
+        presence.clear_chat_unread(current_user.id)
     
     return render_template("chat/chat_room.html", room=room, messages=messages, timedelta=timedelta)
 
@@ -734,8 +812,6 @@ def chat_room(room_id):
 def send_message(room_id):
     """Send a message in chat room"""
     try:
-        from app.models import ChatRoom, ChatMessage, Notification, User
-        
         print(f"Send message request for room {room_id} from user {current_user.id}")
         
         room = ChatRoom.query.get_or_404(room_id)
@@ -747,6 +823,7 @@ def send_message(room_id):
         if current_user.is_admin and room.admin_id != current_user.id:
             print(f"Access denied: Admin {current_user.id} not authorized for room {room_id}")
             return jsonify({'error': 'Access denied'}), 403
+        recipient_id = room.admin_id if current_user.id == room.user_id else room.user_id
         
         message_content = request.form.get('message', '').strip()
         file = request.files.get('file')
@@ -757,21 +834,21 @@ def send_message(room_id):
             print("No message content or file provided")
             return jsonify({'error': 'Message or file required'}), 400
         
-        # Create message with current timestamp and initial status 'sent'
+        # Create the message already delivered (simulating instant
+        # delivery), so it is written by its INSERT alone
+        now = get_ist_now()
         message = ChatMessage(
             chat_room_id=room_id,
-            sender_id=current_user.id,
+            sender=current_user,
             content=message_content if message_content else None,
             message_type='text',
-            status='sent',
-            created_at=get_ist_now()
+            status='delivered',
+            created_at=now,
+            delivered_at=now
         )
         
         # Handle file upload
         if file and file.filename:
-            import os
-            from werkzeug.utils import secure_filename
-            
             filename = secure_filename(file.filename)
             if not filename:
                 return jsonify({'error': 'Invalid filename'}), 400
@@ -790,27 +867,23 @@ def send_message(room_id):
             upload_dir = os.path.join('app', 'static', 'chat_uploads')
             os.makedirs(upload_dir, exist_ok=True)
             
-            unique_filename = f"chat_{room_id}_{get_ist_now().strftime('%Y%m%d_%H%M%S')}_{filename}"
+            unique_filename = f"chat_{room_id}_{now.strftime('%Y%m%d_%H%M%S')}_{filename}"
             file_path = os.path.join(upload_dir, unique_filename)
             
+            # End the read transaction before the write; with SQLite an open
+            # transaction would hold up other writers for the whole upload
+            db.session.commit()
+            
             try:
-                file.save(file_path)
+                file.save(file_path, buffer_size=UPLOAD_BUFFER_SIZE)
                 message.file_path = f"chat_uploads/{unique_filename}"
                 message.file_name = filename
             except Exception as e:
                 return jsonify({'error': f'File upload failed: {str(e)}'}), 500
         
-        db.session.add(message)
-        db.session.flush()  # Get message ID
-        
-        # Mark as delivered immediately (simulating instant delivery)
-        message.mark_delivered()
-        
-        # Update room last message time
-        room.last_message_at = get_ist_now()
+        # The room's last message time is set on commit (see models.py)
         
         # Create notification for recipient
-        recipient_id = room.admin_id if current_user.id == room.user_id else room.user_id
         notification = Notification(
             user_id=recipient_id,
             sender_id=current_user.id,
@@ -818,18 +891,26 @@ def send_message(room_id):
             message=f"{current_user.username}: {message_content[:50]}..." if message_content else f"{current_user.username} sent a file",
             type="chat",
             related_url=f"/chat/{room_id}",
-            created_at=get_ist_now()
+            created_at=now
         )
-        db.session.add(notification)
-        
+        db.session.add_all([message, notification])
+        # Carry the whole message so open chat pages can render it without
+        # fetching it back. Built after the flush assigns the id but before
+        # the commit expires the message and its sender, which would
+        # otherwise be SELECTed again
+        db.session.flush()
+        payload = orjson.dumps(_chat_message_payload(message))
+        message_id, status = message.id, message.status
         db.session.commit()
+        presence.clear_chat_unread(recipient_id)
+        presence.publish_chat(room_id, payload)
         
-        print(f"Message {message.id} created successfully with status {message.status}")
+        print(f"Message {message_id} created successfully with status {status}")
         
         return jsonify({
             'success': True, 
-            'message_id': message.id,
-            'status': message.status,
+            'message_id': message_id,
+            'status': status,
             'message': 'Message sent successfully'
         })
         
@@ -843,8 +924,6 @@ def send_message(room_id):
 @login_required
 def get_messages(room_id):
     """Get messages for chat room (AJAX)"""
-    from app.models import ChatRoom, ChatMessage
-    
     room = ChatRoom.query.get_or_404(room_id)
     
     # Check access permissions
@@ -855,62 +934,103 @@ def get_messages(room_id):
     
     since = request.args.get('since', type=int, default=0)
     
+    # A client that was away for a while catches up one page at a time
+    # rather than in one unbounded response; it asks again while has_more
     try:
-        messages_query = ChatMessage.query.filter_by(chat_room_id=room_id).filter(ChatMessage.id > since)
-        
-        if current_user.is_admin:
-            messages_query = messages_query.filter((ChatMessage.hidden_for_admin == False) | (ChatMessage.hidden_for_admin == None))
-        else:
-            messages_query = messages_query.filter((ChatMessage.hidden_for_user == False) | (ChatMessage.hidden_for_user == None))
-        
-        messages = messages_query.order_by(ChatMessage.created_at.asc()).all()
+        messages = db.session.execute(
+            _CHAT_PAGE_STATEMENTS[bool(current_user.is_admin)],
+            {'room_id': room_id, 'since': since},
+        ).scalars().all()
     except Exception as e:
         print(f"Error loading messages: {e}")
         # Fallback to all messages if column doesn't exist
-        messages = ChatMessage.query.filter_by(chat_room_id=room_id).filter(ChatMessage.id > since).order_by(ChatMessage.created_at.asc()).all()
+        messages = (
+            ChatMessage.query.filter_by(chat_room_id=room_id)
+            .filter(ChatMessage.id > since)
+            .options(selectinload(ChatMessage.sender))
+            .order_by(ChatMessage.id.asc())
+            .limit(CHAT_PAGE_SIZE + 1)
+            .all()
+        )
+    has_more = len(messages) > CHAT_PAGE_SIZE
+    messages = messages[:CHAT_PAGE_SIZE]
     
-    messages_data = []
-    for msg in messages:
-        messages_data.append({
-            'id': msg.id,
-            'sender_id': msg.sender_id,
-            'sender_name': msg.sender.username,
-            'content': msg.content,
-            'message_type': msg.message_type,
-            'file_path': msg.file_path,
-            'file_name': msg.file_name,
-            'created_at': msg.created_at.isoformat(),
-            'created_at_ist': utc_to_ist(msg.created_at).strftime('%I:%M %p IST'),
-            'is_own': msg.sender_id == current_user.id,
-            'status': msg.status,
-            'delivered_at': utc_to_ist(msg.delivered_at).strftime('%I:%M %p IST') if msg.delivered_at else None,
-            'seen_at': utc_to_ist(msg.seen_at).strftime('%I:%M %p IST') if msg.seen_at else None
-        })
+    messages_data = [
+        {**_chat_message_payload(msg), 'is_own': msg.sender_id == current_user.id}
+        for msg in messages
+    ]
+    
+    # Polled by every open chat; orjson encodes this several times faster
+    return Response(
+        orjson.dumps({
+            'messages': messages_data,
+            'next_since': messages[-1].id if messages else since,
+            'has_more': has_more,
+        }),
+        mimetype='application/json',
+    )
+
+
+@bp.route("/chat/<int:room_id>/events")
+@login_required
+def chat_events(room_id):
+    """Server-sent events carrying new messages in a chat room"""
+    # Each stream holds a worker for up to a minute, which only an async
+    # worker class can afford; otherwise the page polls get_messages()
+    if not current_app.config.get("CHAT_EVENT_STREAM"):
+        return Response(status=204)
+    
+    room = ChatRoom.query.get_or_404(room_id)
+    
+    # Check access permissions
+    if not current_user.is_admin and room.user_id != current_user.id:
+        abort(403)
+    if current_user.is_admin and room.admin_id != current_user.id:
+        abort(403)
+    
+    pubsub = presence.subscribe_chat(room_id)
+    if pubsub is None:
+        # 204 tells EventSource not to reconnect; the page falls back to polling
+        return Response(status=204)
+    
+    # The stream stays open for up to a minute; don't hold a pooled
+    # database connection for that long
+    db.session.close()
+    
+    def stream():
+        for payload in presence.iter_chat_events(pubsub):
+            if payload is None:
+                yield ": keep-alive\n\n"
+            else:
+                # Payloads are single-line JSON
+                yield f"data: {payload}\n\n"
     
-    return jsonify({'messages': messages_data})
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @bp.route("/api/chat-notifications")
 @login_required
 def chat_notifications():
     """Get unread chat count for current user"""
-    from app.models import ChatRoom, ChatMessage
+    unread_count = presence.get_chat_unread(current_user.id)
+    if unread_count is not None:
+        return jsonify({'unread_count': unread_count})
     
-    if current_user.is_admin:
-        # Count unread messages from users to admin
-        unread_count = db.session.query(ChatMessage).join(ChatRoom).filter(
-            ChatRoom.admin_id == current_user.id,
-            ChatMessage.is_read == False,
-            ChatMessage.sender_id != current_user.id
-        ).count()
-    else:
-        # Count unread messages from admin to user
-        unread_count = db.session.query(ChatMessage).join(ChatRoom).filter(
-            ChatRoom.user_id == current_user.id,
+    # Admins count messages from users in their rooms, users those from admins
+    own_side = ChatRoom.admin_id if current_user.is_admin else ChatRoom.user_id
+    unread_count = db.session.execute(
+        db.select(db.func.count(ChatMessage.id)).join(ChatRoom).where(
+            own_side == current_user.id,
             ChatMessage.is_read == False,
             ChatMessage.sender_id != current_user.id
-        ).count()
+        )
+    ).scalar()
     
+    presence.set_chat_unread(current_user.id, unread_count)
     return jsonify({'unread_count': unread_count})
 
 
@@ -918,8 +1038,6 @@ def chat_notifications():
 @login_required
 def start_chat():
     """Start a new chat with admin (for users) or redirect to chat list"""
-    from app.models import ChatRoom, User
-    
     if current_user.is_admin:
         return redirect(url_for('main.chat_list'))
     
@@ -929,12 +1047,12 @@ def start_chat():
         return redirect(url_for('main.chat_room', room_id=existing_room.id))
     
     # Create new chat room with first available admin
-    admin = User.query.filter_by(is_admin=True).first()
-    if not admin:
+    admin_id = User.default_admin_id()
+    if not admin_id:
         flash("No admin available for chat at the moment. Please try again later.", "warning")
         return redirect(url_for('main.contact'))
     
-    new_room = ChatRoom(user_id=current_user.id, admin_id=admin.id)
+    new_room = ChatRoom(user_id=current_user.id, admin_id=admin_id)
     db.session.add(new_room)
     db.session.commit()
     
@@ -945,8 +1063,6 @@ def start_chat():
 @login_required
 def mark_messages_seen(room_id):
     """Mark all messages in room as seen by current user"""
-    from app.models import ChatRoom, ChatMessage
-    
     room = ChatRoom.query.get_or_404(room_id)
     
     # Check access permissions
@@ -956,15 +1072,12 @@ def mark_messages_seen(room_id):
         return jsonify({'error': 'Access denied'}), 403
     
     # Mark all unread messages from other user as seen
-    unread_messages = ChatMessage.query.filter_by(
-        chat_room_id=room_id, 
-        is_read=False
-    ).filter(ChatMessage.sender_id != current_user.id).all()
-    
-    for msg in unread_messages:
-        msg.mark_seen()
+    marked_count = ChatMessage.bulk_mark_seen(room_id, current_user.id)
+    if marked_count:
+        db.session.commit()
+        presence.clear_chat_unread(current_user.id)
     
-    return jsonify({'success': True, 'marked_count': len(unread_messages)})
+    return jsonify({'success': True, 'marked_count': marked_count})
 
 
 @bp.route("/api/announcement/<int:announcement_id>/mark-read", methods=["POST"])
@@ -999,8 +1112,6 @@ def mark_announcement_read(announcement_id):
 @login_required
 def get_message_status(message_id):
     """Get status of a specific message"""
-    from app.models import ChatMessage
-    
     message = ChatMessage.query.get_or_404(message_id)
     
     # Only sender can check message status
@@ -1019,8 +1130,6 @@ def get_message_status(message_id):
 @login_required
 def clear_chat_history(room_id):
     """Hide messages for current user only"""
-    from app.models import ChatRoom, ChatMessage
-    
     room = ChatRoom.query.get_or_404(room_id)
     
     # Check access permissions
@@ -1031,14 +1140,7 @@ def clear_chat_history(room_id):
     
     # Hide messages for current user only
     try:
-        messages = ChatMessage.query.filter_by(chat_room_id=room_id).all()
-        
-        for message in messages:
-            if current_user.is_admin:
-                message.hidden_for_admin = True
-            else:
-                message.hidden_for_user = True
-        
+        ChatMessage.bulk_hide(room_id, for_admin=current_user.is_admin)
         db.session.commit()
     except Exception as e:
         print(f"Error clearing messages: {e}")
@@ -1047,53 +1149,99 @@ def clear_chat_history(room_id):
     return jsonify({'success': True, 'message': 'Chat history cleared for you only'})
 
 
+def _last_seen_text(last_seen, now):
+    """Human-readable time since a user was last seen"""
+    if not last_seen:
+        return "Never"
+    # Convert to IST if needed
+    user_last_seen = utc_to_ist(last_seen) if last_seen.tzinfo is None else last_seen
+    time_diff = now - user_last_seen
+    if time_diff.total_seconds() < 60:
+        return "Just now"
+    elif time_diff.total_seconds() < 3600:
+        minutes = int(time_diff.total_seconds() / 60)
+        return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
+    elif time_diff.total_seconds() < 86400:
+        hours = int(time_diff.total_seconds() / 3600)
+        return f"{hours} hour{'s' if hours != 1 else ''} ago"
+    return user_last_seen.strftime('%d %b %Y at %I:%M %p IST')
+
+
+def _user_status_payload(user_id, username, is_online, last_seen, now):
+    """Status JSON for one user, shared by the single and batch endpoints"""
+    return {
+        'user_id': user_id,
+        'username': username,
+        'is_online': bool(is_online),
+        'last_seen': _last_seen_text(last_seen, now),
+        'last_seen_timestamp': utc_to_ist(last_seen).isoformat() if last_seen else None
+    }
+
+
 @bp.route("/api/user/<int:user_id>/status")
 @login_required
 def get_user_status(user_id):
     """Get online status and last seen for a user"""
+    cached = presence.get_user_status(user_id)
+    if cached is not None:
+        return Response(cached, mimetype='application/json')
+    
     user = User.query.get_or_404(user_id)
     
     # Calculate if user is considered online (active within last 5 minutes)
     now = get_ist_now()
     online_threshold = now - timedelta(minutes=5)
     
-    # Ensure both datetimes have timezone info for comparison
-    user_last_seen_tz = utc_to_ist(user.last_seen) if user.last_seen and user.last_seen.tzinfo is None else user.last_seen
-    is_online = user.is_online and (user_last_seen_tz and user_last_seen_tz > online_threshold)
+    # Recent activity is in Redis; the columns only hold flushed values
+    live = presence.get_presence(user.id)
+    if live is not None:
+        is_online, last_seen = live
+    else:
+        last_seen = user.last_seen
+        # Ensure both datetimes have timezone info for comparison
+        user_last_seen_tz = utc_to_ist(last_seen) if last_seen and last_seen.tzinfo is None else last_seen
+        is_online = user.is_online and (user_last_seen_tz and user_last_seen_tz > online_threshold)
     
-    # Format last seen time
-    last_seen_text = "Never"
-    if user.last_seen:
-        # Convert to IST if needed
-        user_last_seen = utc_to_ist(user.last_seen) if user.last_seen.tzinfo is None else user.last_seen
-        time_diff = now - user_last_seen
-        if time_diff.total_seconds() < 60:
-            last_seen_text = "Just now"
-        elif time_diff.total_seconds() < 3600:
-            minutes = int(time_diff.total_seconds() / 60)
-            last_seen_text = f"{minutes} minute{'s' if minutes != 1 else ''} ago"
-        elif time_diff.total_seconds() < 86400:
-            hours = int(time_diff.total_seconds() / 3600)
-            last_seen_text = f"{hours} hour{'s' if hours != 1 else ''} ago"
-        else:
-            last_seen_text = user_last_seen.strftime('%d %b %Y at %I:%M %p IST')
+    body = orjson.dumps(_user_status_payload(user.id, user.username, is_online, last_seen, now))
+    presence.set_user_status(user.id, body)
+    return Response(body, mimetype='application/json')
+
+
+@bp.route("/api/users/status")
+@login_required
+def get_users_status():
+    """Online status for a roster of users, e.g. ?ids=1&ids=2"""
+    user_ids = request.args.getlist('ids', type=int) or request.args.getlist('ids[]', type=int)
+    user_ids = list(dict.fromkeys(user_ids))[:STATUS_BATCH_SIZE]
+    if not user_ids:
+        return jsonify({'users': []})
     
-    return jsonify({
-        'user_id': user.id,
-        'username': user.username,
-        'is_online': is_online,
-        'last_seen': last_seen_text,
-        'last_seen_timestamp': utc_to_ist(user.last_seen).isoformat() if user.last_seen else None
-    })
+    now = get_ist_now()
+    # last_seen is written from get_ist_now(), so the column holds naive
+    # IST wall-clock times; compare against a threshold in the same frame
+    online_threshold = (now - timedelta(minutes=5)).replace(tzinfo=None)
+    rows = db.session.execute(
+        db.select(
+            User.id,
+            User.username,
+            User.last_seen,
+            db.and_(User.is_online, User.last_seen > online_threshold).label('online'),
+        ).where(User.id.in_(user_ids))
+    ).all()
+    
+    # Redis holds activity newer than the flushed columns
+    live = presence.get_presence_many([row.id for row in rows])
+    users = []
+    for row in rows:
+        is_online, last_seen = live.get(row.id, (row.online, row.last_seen))
+        users.append(_user_status_payload(row.id, row.username, is_online, last_seen, now))
+    return Response(orjson.dumps({'users': users}), mimetype='application/json')
 
 
 @bp.route("/api/user/update-activity", methods=["POST"])
 @login_required
 def update_user_activity():
-    """Update user's last seen timestamp"""
-    current_user.last_seen = get_ist_now()
-    current_user.is_online = True
-    db.session.commit()
+    """Activity heartbeat; track_user_activity has already recorded it"""
     return jsonify({'success': True})
 
 
@@ -1101,17 +1249,19 @@ def update_user_activity():
 @login_required
 def mark_notification_read(notification_id):
     """Mark a specific notification as read"""
-    from app.models import Notification
-    
-    notification = Notification.query.get_or_404(notification_id)
-    
-    # Check if user owns this notification
-    if notification.user_id != current_user.id:
-        return jsonify({'success': False, 'error': 'Access denied'}), 403
-    
     try:
-        notification.is_read = True
+        # The ownership check is part of the UPDATE, so there's no SELECT first
+        updated = db.session.execute(
+            db.update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == current_user.id)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
         db.session.commit()
+        if not updated:
+            return jsonify({'success': False, 'error': 'Notification not found'}), 404
+        # Bulk UPDATEs skip the mapper events that keep the count cache fresh
+        invalidate_unread_counts(user_id=current_user.id)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -1122,17 +1272,18 @@ def mark_notification_read(notification_id):
 @login_required
 def delete_notification(notification_id):
     """Delete a specific notification"""
-    from app.models import Notification
-    
-    notification = Notification.query.get_or_404(notification_id)
-    
-    # Check if user owns this notification
-    if notification.user_id != current_user.id:
-        return jsonify({'success': False, 'error': 'Access denied'}), 403
-    
     try:
-        db.session.delete(notification)
+        # The ownership check is part of the DELETE, so there's no SELECT first
+        deleted = db.session.execute(
+            db.delete(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
         db.session.commit()
+        if not deleted:
+            return jsonify({'success': False, 'error': 'Notification not found'}), 404
+        # Bulk deletes skip the mapper events that keep the count cache fresh
+        invalidate_unread_counts(user_id=current_user.id)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -1143,11 +1294,15 @@ def delete_notification(notification_id):
 @login_required
 def clear_all_notifications():
     """Delete all notifications for current user"""
-    from app.models import Notification
-    
     try:
-        Notification.query.filter_by(user_id=current_user.id).delete()
+        db.session.execute(
+            db.delete(Notification)
+            .where(Notification.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
+        # Bulk deletes skip the mapper events that keep the count cache fresh
+        invalidate_unread_counts(user_id=current_user.id)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -1158,10 +1313,8 @@ def clear_all_notifications():
 @login_required
 def get_notification_count():
     """Get unread notification count for current user"""
-    from app.models import Notification
-    
     try:
-        unread_count = Notification.query.filter_by(user_id=current_user.id, is_read=False).count()
+        unread_count = current_user.unread_notifications_count
         return jsonify({'unread_count': unread_count})
     except Exception as e:
         return jsonify({'unread_count': 0, 'error': str(e)}), 500
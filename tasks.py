@@ -5,7 +5,7 @@ from datetime import datetime
 from celery import Celery
 
 from app import create_app, db
-from app.models import Case, SystemLog
+from app.models import Case, SystemLog, User
 from app.vision_engine import VisionProcessor
 
 # We don't create the app here anymore to prevent circular imports.
@@ -109,4 +109,29 @@ def cleanup_files():
             
         except Exception as e:
             logging.error(f"File cleanup failed: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+
+@celery.task
+def flush_presence():
+    """Periodic task to write last-seen times collected in Redis to the user table"""
+    app = create_app()
+    with app.app_context():
+        from app import presence
+
+        pending = presence.drain_last_seen()
+        if not pending:
+            return "No presence updates"
+
+        # One batched UPDATE instead of a write per user per request. Only
+        # last_seen is written: is_online belongs to login and logout, and
+        # a flush landing after a logout must not bring the user back
+        db.session.bulk_update_mappings(
+            User,
+            [
+                {"id": user_id, "last_seen": last_seen}
+                for user_id, last_seen in pending.items()
+            ],
+        )
+        db.session.commit()
+        return f"Flushed last seen for {len(pending)} users"
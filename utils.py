@@ -4,6 +4,7 @@ Utility functions for security and data processing
 import html
 import os
 import re
+import filetype
 from markupsafe import Markup
 from flask import current_app
 from werkzeug.utils import secure_filename
@@ -99,24 +100,24 @@ def create_safe_filename(base_name, extension=None):
     return secure_filename(filename)
 
 
-def validate_file_content(file_path, expected_type='image'):
+# Copy buffer for FileStorage.save(); Werkzeug's 16 KB default means four
+# times as many read/write calls for large video uploads
+UPLOAD_BUFFER_SIZE = 64 * 1024
+
+
+def sniff_upload_type(file_storage, expected_type='image'):
     """
-    Validate file content matches expected type (basic MIME type checking)
+    Check an upload's magic bytes before it is saved. Only the first 512
+    bytes are read, and the stream is rewound for the later save()
     """
-    import mimetypes
+    stream = file_storage.stream
+    head = stream.read(512)
+    stream.seek(0)
     
-    if not os.path.exists(file_path):
+    kind = filetype.guess(head)
+    if kind is None:
         return False
-    
-    # Get MIME type
-    mime_type, _ = mimetypes.guess_type(file_path)
-    
-    if expected_type == 'image':
-        return mime_type and mime_type.startswith('image/')
-    elif expected_type == 'video':
-        return mime_type and mime_type.startswith('video/')
-    
-    return False
+    return kind.mime.startswith(f"{expected_type}/")
 
 
 def sanitize_filename(filename):
@@ -141,4 +142,16 @@ def sanitize_filename(filename):
     if not filename:
         return None
     
-    return filename
\ No newline at end of file
+    return filename
+
+def keyset_paginate(query, cursor_col, cursor_val=None, per_page=50):
+    """
+    Fetch one page of a newest-first listing by seeking past the last
+    cursor value instead of using OFFSET; returns (items, has_next)
+    """
+    if cursor_val is not None:
+        query = query.filter(cursor_col < cursor_val)
+    
+    # One extra row tells us whether another page exists without a COUNT
+    items = query.order_by(cursor_col.desc()).limit(per_page + 1).all()
+    return items[:per_page], len(items) > per_page